@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(autouse=True, scope='session')
+def isolated_cache():
+    """pytest не читает TEST_RUNNER: тот же кэш, что в manage.py test."""
+    from core.test_runner import isolated_cache
+
+    with isolated_cache():
+        yield
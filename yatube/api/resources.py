@@ -0,0 +1,127 @@
+"""Поля ресурсов API и курсоры по строкам .values().
+
+Каждый ресурс — словарь «имя поля в ответе → путь в ORM».
+Ответ собирается прямо из строк .values(), без экземпляров моделей;
+?fields= выбирает подмножество полей, и из базы читаются только они.
+"""
+from core.paginator import CursorPaginator
+from core.storage import content_storage
+
+
+class ApiError(Exception):
+    """Неверный запрос: отдаётся клиенту как 400 с текстом ошибки."""
+
+
+POST_FIELDS = {
+    'id': 'id',
+    'created': 'created',
+    'text': 'text',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'image_width': 'image_width',
+    'image_height': 'image_height',
+    'comments_count': 'comments_count',
+}
+
+# Комментарии сбрасывают только ключ поста, а ETag ленты зависит
+# от ключа feed, поэтому в ленте нет числа комментариев
+FEED_POST_FIELDS = {
+    name: lookup for name, lookup in POST_FIELDS.items()
+    if name != 'comments_count'
+}
+
+COMMENT_FIELDS = {
+    'id': 'id',
+    'created': 'created',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+}
+
+GROUP_FIELDS = {
+    'id': 'id',
+    'slug': 'slug',
+    'title': 'title',
+    'description': 'description',
+}
+
+PROFILE_FIELDS = {
+    'id': 'id',
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'posts_count': 'stats__posts_count',
+    'followers_count': 'stats__followers_count',
+    'following_count': 'stats__following_count',
+}
+
+FOLLOW_FIELDS = {
+    'id': 'id',
+    'user': 'user__username',
+    'author': 'author__username',
+}
+
+
+def image_url(name):
+    return content_storage.url(name) if name else None
+
+
+# Значения, которые в ответе выглядят иначе, чем в базе
+CONVERTERS = {
+    'image': image_url,
+}
+
+
+def requested_fields(request, spec):
+    """Поля из ?fields=a,b или все поля ресурса."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(spec)
+    names = [name for name in raw.split(',') if name]
+    unknown = [name for name in names if name not in spec]
+    if unknown:
+        raise ApiError(
+            f'Неизвестные поля: {", ".join(unknown)}; '
+            f'доступны: {", ".join(spec)}'
+        )
+    return names
+
+
+def lookups(spec, names, *extra):
+    """Пути ORM для .values(): выбранные поля и поля курсора."""
+    return list(dict.fromkeys([spec[name] for name in names] + list(extra)))
+
+
+def serialize(row, spec, names):
+    result = {}
+    for name in names:
+        value = row[spec[name]]
+        convert = CONVERTERS.get(name)
+        result[name] = convert(value) if convert else value
+    return result
+
+
+class ValuesPaginator(CursorPaginator):
+    """Курсор (created, id) по словарям из .values()."""
+
+    @staticmethod
+    def key(row):
+        return row['created'], row['id']
+
+
+class IdPaginator(CursorPaginator):
+    """Курсор по id — для ресурсов без даты создания."""
+    keys = ('id', 'id')
+
+    @staticmethod
+    def key(row):
+        return row['id'], row['id']
+
+    @staticmethod
+    def dump_value(value):
+        return str(value)
+
+    @staticmethod
+    def load_value(raw):
+        return int(raw)
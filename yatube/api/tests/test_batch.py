@@ -0,0 +1,110 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Group, Post, User
+
+from ..views import API_BATCH_LIMIT
+
+
+class BatchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Title', slug='test-slug', description='description'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {i}', group=cls.group
+            )
+            for i in range(4)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def batch(self, ids, **params):
+        return self.client.get(
+            reverse('api:posts_batch'),
+            {'ids': ','.join(map(str, ids)), **params},
+        )
+
+    def test_requested_order(self):
+        ids = [self.posts[2].pk, self.posts[0].pk, self.posts[3].pk]
+        data = self.batch(ids, fields='id,author,group').json()
+        self.assertEqual([row['id'] for row in data['results']], ids)
+        self.assertEqual(
+            data['results'][0],
+            {'id': ids[0], 'author': 'Author', 'group': 'test-slug'},
+        )
+        self.assertEqual(data['missing'], [])
+
+    def test_missing_and_duplicates(self):
+        pk = self.posts[1].pk
+        data = self.batch([pk, 999999, pk]).json()
+        self.assertEqual([row['id'] for row in data['results']], [pk])
+        self.assertEqual(data['missing'], [999999])
+
+    def test_misses_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.batch([post.pk for post in self.posts])
+        select = [q['sql'] for q in queries if 'posts_post' in q['sql']]
+        self.assertEqual(len(select), 1)
+        self.assertIn(' IN ', select[0])
+        self.assertIn('auth_user', select[0])
+
+    def test_cached_posts_skip_database(self):
+        ids = [post.pk for post in self.posts]
+        self.batch(ids[:2])
+        with CaptureQueriesContext(connection) as queries:
+            data = self.batch(ids).json()
+        select = [q['sql'] for q in queries if 'posts_post' in q['sql']]
+        self.assertEqual(len(select), 1)
+        for pk in ids[:2]:
+            self.assertNotIn(str(pk), select[0].split(' IN ')[1])
+        self.assertEqual([row['id'] for row in data['results']], ids)
+        with self.assertNumQueries(0):
+            self.batch(ids)
+
+    def test_changes_invalidate_cache(self):
+        post = Post.objects.create(author=self.author, text='Текст')
+        self.batch([post.pk])
+        post.text = 'Новый текст'
+        post.save()
+        data = self.batch([post.pk], fields='text').json()
+        self.assertEqual(data['results'], [{'text': 'Новый текст'}])
+        Comment.objects.create(post=post, author=self.author, text='Комм')
+        data = self.batch([post.pk], fields='comments_count').json()
+        self.assertEqual(data['results'], [{'comments_count': 1}])
+        pk = post.pk
+        post.delete()
+        data = self.batch([pk]).json()
+        self.assertEqual(data['results'], [])
+        self.assertEqual(data['missing'], [pk])
+
+    def test_missing_id_filled_after_create(self):
+        """Ответ с ненайденным id сбрасывается, когда пост появится."""
+        other = User.objects.create_user(username='Other')
+        pk = Post.objects.order_by('-pk').first().pk + 1000
+        ids = [self.posts[0].pk, pk]
+        self.assertEqual(self.batch(ids, fields='id').json()['missing'], [pk])
+        Post.objects.create(pk=pk, author=other, text='Новый')
+        data = self.batch(ids, fields='id').json()
+        self.assertEqual([row['id'] for row in data['results']], ids)
+        self.assertEqual(data['missing'], [])
+
+    def test_surrogate_keys(self):
+        response = self.batch([self.posts[0].pk])
+        keys = response['Surrogate-Key'].split()
+        self.assertIn(f'post:{self.posts[0].pk}', keys)
+        self.assertIn(f'group:{self.group.pk}', keys)
+
+    def test_bad_ids(self):
+        self.assertEqual(self.batch(['x']).status_code, 400)
+        self.assertEqual(self.batch([]).status_code, 400)
+        too_many = range(1, API_BATCH_LIMIT + 2)
+        self.assertEqual(self.batch(too_many).status_code, 400)
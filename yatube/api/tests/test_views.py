@@ -0,0 +1,153 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Title', slug='test-slug', description='description'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {i}', group=cls.group
+            )
+            for i in range(5)
+        ]
+        for i in range(3):
+            Comment.objects.create(
+                post=cls.posts[0], author=cls.reader, text=f'Комм {i}'
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def get(self, name, *args, **params):
+        return self.client.get(reverse(f'api:{name}', args=args), params)
+
+    def test_posts_cursor_pages(self):
+        """Страницы по курсору идут от новых постов к старым без повторов."""
+        seen = []
+        params = {'limit': 2, 'fields': 'id'}
+        while True:
+            data = self.get('posts', **params).json()
+            seen += [row['id'] for row in data['results']]
+            if not data['next']:
+                break
+            params['after'] = data['next']
+        self.assertEqual(seen, [post.pk for post in reversed(self.posts)])
+
+    def test_sparse_fields(self):
+        data = self.get('posts', fields='text,author', limit=1).json()
+        self.assertEqual(
+            data['results'], [{'text': 'Пост 4', 'author': 'Author'}]
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.get('posts', fields='text')
+        select = [q['sql'] for q in queries if 'posts_post' in q['sql']]
+        self.assertNotIn('auth_user', select[-1])
+
+    def test_unknown_field(self):
+        response = self.get('posts', fields='text,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['error'])
+
+    def test_filters(self):
+        other = Group.objects.create(
+            title='Other', slug='other', description='description'
+        )
+        Post.objects.create(author=self.reader, text='Чужой', group=other)
+        data = self.get('posts', group='other', fields='text').json()
+        self.assertEqual(data['results'], [{'text': 'Чужой'}])
+        data = self.get('posts', author='Author', limit=100).json()
+        self.assertEqual(len(data['results']), 5)
+
+    def test_etag_not_modified(self):
+        response = self.get('post', self.posts[0].pk)
+        self.assertEqual(response.json()['comments_count'], 3)
+        etag = response['ETag']
+        response = self.client.get(
+            reverse('api:post', args=[self.posts[0].pk]),
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Ещё'
+        )
+        response = self.client.get(
+            reverse('api:post', args=[self.posts[0].pk]),
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['comments_count'], 4)
+
+    def test_not_found(self):
+        response = self.get('post', 0)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'error': 'Не найдено'})
+        self.assertEqual(self.get('profile', 'nobody').status_code, 404)
+
+    def test_comments_oldest_first(self):
+        data = self.get('comments', self.posts[0].pk, fields='text').json()
+        self.assertEqual(
+            [row['text'] for row in data['results']],
+            ['Комм 0', 'Комм 1', 'Комм 2'],
+        )
+
+    def test_groups(self):
+        data = self.get('groups').json()
+        self.assertEqual(data['results'][0]['slug'], 'test-slug')
+        data = self.get('group', 'test-slug', fields='title').json()
+        self.assertEqual(data, {'title': 'Title'})
+
+    def test_profile_and_follows(self):
+        data = self.get('profile', 'Author').json()
+        self.assertEqual(data['posts_count'], 5)
+        self.assertEqual(data['followers_count'], 1)
+        data = self.get('followers', 'Author').json()
+        self.assertEqual(data['results'][0]['user'], 'Reader')
+        data = self.get('following', 'Reader').json()
+        self.assertEqual(data['results'][0]['author'], 'Author')
+
+    def test_follow_lists_track_usernames(self):
+        """Списки подписок помечены ключами перечисленных пользователей
+        и обновляются, когда те меняют имя."""
+        response = self.get('followers', 'Author')
+        self.assertIn(
+            f'author:{self.reader.pk}', response['Surrogate-Key'].split()
+        )
+        response = self.get('following', 'Reader')
+        self.assertIn(
+            f'author:{self.author.pk}', response['Surrogate-Key'].split()
+        )
+        reader = User.objects.get(pk=self.reader.pk)
+        reader.username = 'Renamed'
+        reader.save()
+        data = self.get('followers', 'Author').json()
+        self.assertEqual(data['results'][0]['user'], 'Renamed')
+
+    def test_comments_track_usernames(self):
+        """Комментарии помечены ключами их авторов и обновляются,
+        когда те меняют имя."""
+        response = self.get('comments', self.posts[0].pk)
+        self.assertIn(
+            f'author:{self.reader.pk}', response['Surrogate-Key'].split()
+        )
+        reader = User.objects.get(pk=self.reader.pk)
+        reader.username = 'Renamed'
+        reader.save()
+        data = self.get('comments', self.posts[0].pk).json()
+        self.assertEqual(data['results'][0]['author'], 'Renamed')
+
+    def test_read_only(self):
+        response = self.client.post(reverse('api:posts'))
+        self.assertEqual(response.status_code, 405)
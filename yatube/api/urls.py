@@ -0,0 +1,29 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', views.posts, name='posts'),
+    path('posts/batch/', views.posts_batch, name='posts_batch'),
+    path('posts/<int:post_id>/', views.post, name='post'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.comments,
+        name='comments'
+    ),
+    path('groups/', views.groups, name='groups'),
+    path('groups/<slug:slug>/', views.group, name='group'),
+    path('profiles/<str:username>/', views.profile, name='profile'),
+    path(
+        'profiles/<str:username>/followers/',
+        views.followers,
+        name='followers'
+    ),
+    path(
+        'profiles/<str:username>/following/',
+        views.following,
+        name='following'
+    ),
+]
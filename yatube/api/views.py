@@ -0,0 +1,269 @@
+import time
+from functools import wraps
+
+from core.page_cache import (add_surrogate_keys, conditional, get_tagged,
+                             set_tagged)
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_safe
+from posts import caching
+from posts.models import Comment, Follow, Group, Post, User
+
+from yatube.settings import PAGE_CONST
+
+from .resources import (COMMENT_FIELDS, FEED_POST_FIELDS, FOLLOW_FIELDS,
+                        GROUP_FIELDS, POST_FIELDS, PROFILE_FIELDS, ApiError,
+                        IdPaginator, ValuesPaginator, lookups,
+                        requested_fields, serialize)
+
+API_MAX_LIMIT = 100
+API_BATCH_LIMIT = 100
+
+
+def api_view(scope=None):
+    """GET-ресурс API: ETag по ключам scope, ошибки — в JSON.
+
+    Ответ помечается теми же ключами Surrogate-Key, поэтому
+    гостям его отдаёт кэш страниц, а клиенту с тем же ETag — 304.
+    Без scope ключи заранее неизвестны и 304 не отдаётся.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                data, keys = view(request, *args, **kwargs)
+            except ApiError as error:
+                return JsonResponse({'error': str(error)}, status=400)
+            except Http404:
+                return JsonResponse({'error': 'Не найдено'}, status=404)
+            return add_surrogate_keys(JsonResponse(data), *keys)
+        if scope is not None:
+            wrapper = conditional(scope)(wrapper)
+        return require_safe(wrapper)
+    return decorator
+
+
+def limit_param(request):
+    try:
+        limit = int(request.GET.get('limit', PAGE_CONST))
+    except ValueError:
+        raise ApiError('limit должен быть числом')
+    return max(1, min(limit, API_MAX_LIMIT))
+
+
+def get_one(queryset, spec, request, *extra):
+    """Один объект: ответ и строка, где есть id и поля из extra."""
+    names = requested_fields(request, spec)
+    row = queryset.values(*lookups(spec, names, 'id', *extra)).first()
+    if row is None:
+        raise Http404
+    return serialize(row, spec, names), row
+
+
+def get_page(queryset, spec, request, *extra, paginator=ValuesPaginator,
+             **options):
+    """Страница ресурса по курсору: results, next и previous.
+
+    Вместе с ответом возвращает строки страницы, где есть
+    и поля из extra.
+    """
+    names = requested_fields(request, spec)
+    page = paginator(
+        queryset.order_by(*paginator.keys).values(
+            *lookups(spec, names, *paginator.keys, *extra)
+        ),
+        limit_param(request),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        **options,
+    )
+    rows = page.cursor_page()
+    return {
+        'results': [serialize(row, spec, names) for row in rows],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }, rows
+
+
+def author_pk(username):
+    pk = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if pk is None:
+        raise Http404
+    return pk
+
+
+def profile_scope(request, username):
+    """Профиль меняют и свои подписки, и подписчики."""
+    author = User.objects.filter(username=username).only('pk').first()
+    return author and [f'author:{author.pk}', f'timeline:{author.pk}']
+
+
+@api_view(caching.index_scope)
+def posts(request):
+    """Лента постов; ?author= и ?group= сужают её."""
+    queryset = Post.objects.all()
+    if request.GET.get('author'):
+        queryset = queryset.filter(author__username=request.GET['author'])
+    if request.GET.get('group'):
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    data, _ = get_page(queryset, FEED_POST_FIELDS, request)
+    return data, ['feed']
+
+
+def ids_param(request):
+    """id из ?ids=1,2,3 без повторов, в порядке запроса."""
+    try:
+        ids = [
+            int(value)
+            for raw in request.GET.getlist('ids')
+            for value in raw.split(',')
+            if value
+        ]
+    except ValueError:
+        raise ApiError('ids — числа через запятую')
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ApiError('Нужен параметр ids')
+    if len(ids) > API_BATCH_LIMIT:
+        raise ApiError(f'Не больше {API_BATCH_LIMIT} id за раз')
+    return ids
+
+
+def post_cache_key(pk):
+    return f'api:post:{pk}'
+
+
+def cached_posts(ids, since):
+    """Строки постов по id: из кэша, промахи — одним запросом IN.
+
+    Возвращает словарь id → (строка, ключи Surrogate-Key поста).
+    Запись в кэше устаревает вместе со страницей поста, его автора
+    или группы; since — время до запроса, как в set_tagged.
+    """
+    cached = get_tagged([post_cache_key(pk) for pk in ids])
+    found = {
+        pk: cached[post_cache_key(pk)]
+        for pk in ids if post_cache_key(pk) in cached
+    }
+    missing = [pk for pk in ids if pk not in found]
+    if missing:
+        rows = Post.objects.filter(pk__in=missing).values(
+            *lookups(POST_FIELDS, POST_FIELDS, 'author', 'group')
+        )
+        fresh = {}
+        for row in rows:
+            keys = caching.post_keys(Post(
+                pk=row['id'], author_id=row['author'], group_id=row['group']
+            ))
+            fresh[row['id']] = (row, keys)
+        set_tagged({
+            post_cache_key(pk): (entry, entry[1])
+            for pk, entry in fresh.items()
+        }, since)
+        found.update(fresh)
+    return found
+
+
+@api_view()
+def posts_batch(request):
+    """Посты по списку id в том же порядке; ненайденные — в missing.
+
+    Ответ с ненайденными id помечается ещё и ключом feed:
+    его сбрасывает создание любого поста.
+    """
+    ids = ids_param(request)
+    names = requested_fields(request, POST_FIELDS)
+    # Время снимка страницы: ключи, которые заведёт set_tagged,
+    # не должны оказаться новее него, иначе ответ не закэшируется
+    since = getattr(request, 'surrogate_since', None) or time.time_ns()
+    found = cached_posts(ids, since)
+    keys = {key for _, post_keys in found.values() for key in post_keys}
+    missing = [pk for pk in ids if pk not in found]
+    if missing:
+        keys.add('feed')
+    data = {
+        'results': [
+            serialize(found[pk][0], POST_FIELDS, names)
+            for pk in ids if pk in found
+        ],
+        'missing': missing,
+    }
+    return data, sorted(keys)
+
+
+@api_view(caching.post_scope)
+def post(request, post_id):
+    data, row = get_one(
+        Post.objects.filter(pk=post_id), POST_FIELDS, request,
+        'author', 'group',
+    )
+    keys = caching.post_keys(
+        Post(pk=row['id'], author_id=row['author'], group_id=row['group'])
+    )
+    return data, keys
+
+
+# Комментарии показывают имена авторов: как у списков подписок,
+# их ключи известны только после запроса
+@api_view()
+def comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    data, rows = get_page(
+        Comment.objects.filter(post_id=post_id), COMMENT_FIELDS, request,
+        'author_id', descending=False,
+    )
+    return data, [f'post:{post_id}', *listed_keys(rows, 'author_id')]
+
+
+@api_view(caching.index_scope)
+def groups(request):
+    data, _ = get_page(
+        Group.objects.all(), GROUP_FIELDS, request,
+        paginator=IdPaginator, descending=False,
+    )
+    return data, ['feed']
+
+
+@api_view(caching.group_scope)
+def group(request, slug):
+    data, row = get_one(
+        Group.objects.filter(slug=slug), GROUP_FIELDS, request
+    )
+    return data, [f'group:{row["id"]}']
+
+
+@api_view(profile_scope)
+def profile(request, username):
+    data, row = get_one(
+        User.objects.filter(username=username), PROFILE_FIELDS, request
+    )
+    return data, [f'author:{row["id"]}', f'timeline:{row["id"]}']
+
+
+def listed_keys(rows, field):
+    """Ключи пользователей из списка: их имена есть в ответе."""
+    return [f'author:{row[field]}' for row in rows]
+
+
+# Списки подписок показывают имена других пользователей, их ключи
+# известны только после запроса, поэтому 304 по scope не отдаётся
+@api_view()
+def followers(request, username):
+    pk = author_pk(username)
+    data, rows = get_page(
+        Follow.objects.filter(author_id=pk), FOLLOW_FIELDS, request,
+        'user_id', paginator=IdPaginator,
+    )
+    return data, [f'author:{pk}', *listed_keys(rows, 'user_id')]
+
+
+@api_view()
+def following(request, username):
+    pk = author_pk(username)
+    data, rows = get_page(
+        Follow.objects.filter(user_id=pk), FOLLOW_FIELDS, request,
+        'author_id', paginator=IdPaginator,
+    )
+    return data, [f'timeline:{pk}', *listed_keys(rows, 'author_id')]
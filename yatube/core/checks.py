@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def shared_cache_check(app_configs, **kwargs):
+    """Сброс кэша в одном процессе должен быть виден остальным."""
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        'Кэш живёт в памяти процесса: сброс страниц в одном процессе '
+        'или в runworker не дойдёт до остальных.',
+        hint='Задайте memcached или Redis через CACHE_BACKEND '
+             'и CACHE_LOCATION.',
+        id='core.W001',
+    )]
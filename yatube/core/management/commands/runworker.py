@@ -0,0 +1,63 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.tasks import claim, execute
+
+
+def run(task):
+    try:
+        execute(task)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет задачи фоновой очереди в пуле потоков. '
+        'Обработчиков можно запустить несколько, в разных процессах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=settings.TASK_WORKERS,
+            help='Сколько задач выполнять одновременно',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти',
+        )
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        done = 0
+        running = set()
+        with ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix='tasks'
+        ) as executor:
+            try:
+                while True:
+                    free = threads - len(running)
+                    tasks = claim(free) if free else []
+                    close_old_connections()
+                    for task in tasks:
+                        running.add(executor.submit(run, task))
+                    if not running:
+                        if options['once']:
+                            break
+                        time.sleep(settings.TASK_POLL_INTERVAL)
+                        continue
+                    finished, running = wait(
+                        running,
+                        timeout=settings.TASK_POLL_INTERVAL,
+                        return_when=FIRST_COMPLETED,
+                    )
+                    done += len(finished)
+            except KeyboardInterrupt:
+                # Незаконченные задачи вернутся в очередь, когда
+                # истечёт их аренда
+                self.stdout.write('Остановка…')
+        self.stdout.write(f'Выполнено задач: {done}')
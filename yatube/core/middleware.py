@@ -0,0 +1,23 @@
+from . import page_cache
+
+
+class AnonymousPageCacheMiddleware:
+    """Отдаёт гостям готовые страницы из кэша.
+
+    Кэшируются только ответы, помеченные ключами Surrogate-Key;
+    запись в модели сбрасывает страницы по этим ключам.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not page_cache.is_cacheable(request):
+            return self.get_response(request)
+        response = page_cache.get_page(request)
+        if response is not None:
+            return response
+        page_cache.snapshot(request)
+        response = self.get_response(request)
+        page_cache.store_page(request, response)
+        return response
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Имя файла')),
+                ('refs', models.IntegerField(default=0, verbose_name='Ссылок')),
+            ],
+            options={
+                'verbose_name': 'Blob',
+                'verbose_name_plural': 'Blobs',
+            },
+        ),
+    ]
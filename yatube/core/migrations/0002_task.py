@@ -0,0 +1,39 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:42
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('func', models.CharField(max_length=255, verbose_name='Функция')),
+                ('args', models.TextField(default='[]', verbose_name='Аргументы')),
+                ('key', models.CharField(blank=True, help_text='Одинаковые задачи в очереди не дублируются', max_length=255, null=True, unique=True, verbose_name='Ключ')),
+                ('priority', models.SmallIntegerField(default=0, verbose_name='Приоритет')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Выполнить после')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')),
+                ('locked_by', models.CharField(blank=True, max_length=32, verbose_name='Обработчик')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='Аренда до')),
+                ('failed', models.BooleanField(default=False, verbose_name='Не выполнена')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Task',
+                'verbose_name_plural': 'Tasks',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['failed', '-priority', 'run_at'], name='task_ready_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_task'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blob',
+            name='pinned_until',
+            field=models.DateTimeField(blank=True, help_text='Загрузка держит файл, пока пост на него не сослался', null=True, verbose_name='Закреплён до'),
+        ),
+    ]
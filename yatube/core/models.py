@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -13,3 +14,57 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class Blob(models.Model):
+    """Счётчик ссылок на файл в хранилище с именами по содержимому."""
+    name = models.CharField('Имя файла', max_length=255, primary_key=True)
+    refs = models.IntegerField('Ссылок', default=0)
+    pinned_until = models.DateTimeField(
+        'Закреплён до',
+        null=True,
+        blank=True,
+        help_text='Загрузка держит файл, пока пост на него не сослался',
+    )
+
+    class Meta:
+        verbose_name = 'Blob'
+        verbose_name_plural = 'Blobs'
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class Task(models.Model):
+    """Задача фоновой очереди, см. core.tasks."""
+    func = models.CharField('Функция', max_length=255)
+    args = models.TextField('Аргументы', default='[]')
+    key = models.CharField(
+        'Ключ',
+        max_length=255,
+        blank=True,
+        null=True,
+        unique=True,
+        help_text='Одинаковые задачи в очереди не дублируются',
+    )
+    priority = models.SmallIntegerField('Приоритет', default=0)
+    run_at = models.DateTimeField('Выполнить после', default=timezone.now)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    locked_by = models.CharField('Обработчик', max_length=32, blank=True)
+    locked_until = models.DateTimeField('Аренда до', blank=True, null=True)
+    failed = models.BooleanField('Не выполнена', default=False)
+    error = models.TextField('Ошибка', blank=True)
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['failed', '-priority', 'run_at'],
+                name='task_ready_idx',
+            ),
+        ]
+        verbose_name = 'Task'
+        verbose_name_plural = 'Tasks'
+
+    def __str__(self) -> str:
+        return f'{self.func}{self.args}'
@@ -0,0 +1,178 @@
+import hashlib
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.utils.timezone import utc
+from django.views.decorators.http import condition
+
+SURROGATE_HEADER = 'Surrogate-Key'
+
+
+def _tag_key(tag):
+    return f'surrogate:{tag}'
+
+
+def _page_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'page:{request.method}:{path}'
+
+
+def add_surrogate_keys(response, *tags):
+    """Помечает ответ ключами, по которым его можно сбросить из кэша."""
+    current = response.get(SURROGATE_HEADER, '').split()
+    response[SURROGATE_HEADER] = ' '.join(current + list(tags))
+    return response
+
+
+def _bump(tags):
+    now = time.time_ns()
+    cache.set_many({_tag_key(tag): now for tag in tags}, None)
+
+
+def purge(*tags):
+    """Сбрасывает все закэшированные страницы с любым из ключей.
+
+    Внутри транзакции ключи сбрасываются ещё раз после фиксации:
+    страница, собранная между сбросом и фиксацией из старых данных,
+    иначе осталась бы в кэше под новой версией.
+    """
+    _bump(tags)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump(tags))
+
+
+def _tag_versions(tags, since=None):
+    """Версии ключей; отсутствующие заводятся с версией since."""
+    keys = {_tag_key(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        version = since or time.time_ns()
+        for key in missing:
+            cache.add(key, version, None)
+        found.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def snapshot(request):
+    """Запоминает момент до вызова view.
+
+    Страница, ключи которой сбросили позже, могла прочитать
+    старые данные, и store_page её не сохранит.
+    """
+    request.surrogate_since = time.time_ns()
+
+
+def is_cacheable(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+    )
+
+
+def get_page(request):
+    """Достаёт страницу из кэша, если ни один её ключ не сброшен."""
+    entry = cache.get(_page_key(request))
+    if entry is None:
+        return None
+    content, status, headers, versions = entry
+    current = cache.get_many([_tag_key(tag) for tag in versions])
+    for tag, version in versions.items():
+        if current.get(_tag_key(tag)) != version:
+            return None
+    response = HttpResponse(content, status=status)
+    for header, value in headers:
+        response[header] = value
+    return response
+
+
+def store_page(request, response):
+    tags = response.get(SURROGATE_HEADER, '').split()
+    if (
+        response.status_code != 200
+        or response.streaming
+        or response.cookies
+        or not tags
+    ):
+        return
+    since = request.surrogate_since
+    versions = _tag_versions(tags, since)
+    if any(version > since for version in versions.values()):
+        return
+    entry = (response.content, response.status_code,
+             list(response.items()), versions)
+    cache.set(_page_key(request), entry, settings.PAGE_CACHE_TIMEOUT)
+
+
+def get_tagged(keys):
+    """Значения из кэша, записанные set_tagged, чьи ключи не сброшены.
+
+    Два похода в кэш на любое число значений: за самими значениями
+    и за версиями их ключей Surrogate-Key.
+    """
+    entries = cache.get_many(keys)
+    tags = {tag for _, versions in entries.values() for tag in versions}
+    current = cache.get_many([_tag_key(tag) for tag in tags])
+    return {
+        key: value
+        for key, (value, versions) in entries.items()
+        if all(
+            current.get(_tag_key(tag)) == version
+            for tag, version in versions.items()
+        )
+    }
+
+
+def set_tagged(items, since, timeout=None):
+    """Кладёт в кэш значения с ключами Surrogate-Key.
+
+    items — словарь «ключ кэша → (значение, ключи Surrogate-Key)»;
+    purge любого из ключей делает значение устаревшим. since — время
+    (time.time_ns()) до чтения значений: значение, ключ которого
+    сбросили позже, могло прочитать старые данные и не кладётся.
+    """
+    versions = _tag_versions(
+        {tag for _, tags in items.values() for tag in tags}, since
+    )
+    cache.set_many({
+        key: (value, {tag: versions[tag] for tag in tags})
+        for key, (value, tags) in items.items()
+        if all(versions[tag] <= since for tag in tags)
+    }, settings.PAGE_CACHE_TIMEOUT if timeout is None else timeout)
+
+
+def _scope_versions(request, scope, args, kwargs):
+    if not hasattr(request, 'surrogate_versions'):
+        tags = scope(request, *args, **kwargs)
+        request.surrogate_versions = tags and _tag_versions(
+            tags, getattr(request, 'surrogate_since', None)
+        )
+    return request.surrogate_versions
+
+
+def conditional(scope):
+    """Отвечает 304 по версиям ключей страницы, не вызывая view.
+
+    scope(request, *args, **kwargs) возвращает ключи Surrogate-Key
+    страницы или None, если проверить их заранее нельзя.
+    """
+    def etag(request, *args, **kwargs):
+        versions = _scope_versions(request, scope, args, kwargs)
+        if not versions:
+            return None
+        user = request.user.pk if request.user.is_authenticated else ''
+        parts = [str(user), request.META.get('CSRF_COOKIE', '')]
+        parts += [f'{tag}={versions[tag]}' for tag in sorted(versions)]
+        return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        versions = _scope_versions(request, scope, args, kwargs)
+        if not versions:
+            return None
+        return datetime.fromtimestamp(max(versions.values()) / 1e9, tz=utc)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,147 @@
+import heapq
+from datetime import datetime
+from itertools import islice
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from yatube.settings import PAGE_CONST
+
+
+class CursorPaginator(Paginator):
+    """Постраничная навигация по ключу (created, id).
+
+    Вместо COUNT и OFFSET выбирает на одну запись больше страницы,
+    начиная с позиции курсора, поэтому дальние страницы отдаются
+    так же быстро, как первая.
+
+    keys задаёт поля ключа в object_list, если они называются иначе,
+    а unwrap — атрибут строки, в котором лежит сам объект ленты.
+    С descending=False лента идёт от старых записей к новым.
+    Querysets из extra читаются тем же курсором и сливаются
+    с object_list в одну ленту.
+    """
+    keys = ('created', 'id')
+    descending = True
+    is_cursor = True
+
+    def __init__(self, object_list, per_page, after=None, before=None,
+                 keys=None, unwrap=None, extra=(), descending=None):
+        super().__init__(object_list, per_page)
+        if descending is not None:
+            self.descending = descending
+        self.sources = [(object_list, keys or self.keys, unwrap)]
+        self.sources += [(queryset, self.keys, None) for queryset in extra]
+        self.after = self.decode(after)
+        self.before = None if self.after else self.decode(before)
+        if self.after:
+            self.token = f'after:{after}'
+        elif self.before:
+            self.token = f'before:{before}'
+        else:
+            self.token = ''
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    @staticmethod
+    def key(obj):
+        return obj.created, obj.pk
+
+    @staticmethod
+    def dump_value(value):
+        return value.isoformat()
+
+    @staticmethod
+    def load_value(raw):
+        return datetime.fromisoformat(raw)
+
+    def encode(self, obj):
+        value, pk = self.key(obj)
+        raw = f'{self.dump_value(value)}|{pk}'.encode()
+        return urlsafe_base64_encode(raw)
+
+    def decode(self, token):
+        """Разбирает курсор, на мусор отвечает None — первой страницей."""
+        if not token:
+            return None
+        try:
+            value, pk = force_str(urlsafe_base64_decode(token)).split('|')
+            return self.load_value(value), int(pk)
+        except (TypeError, ValueError):
+            return None
+
+    def _fetch(self, queryset, keys, unwrap, descending):
+        created, pk = keys
+        cursor = self.after or self.before
+        if cursor:
+            lookup = 'lt' if descending else 'gt'
+            value, last = cursor
+            queryset = queryset.filter(
+                Q(**{f'{created}__{lookup}': value})
+                | Q(**{created: value, f'{pk}__{lookup}': last})
+            )
+        if descending:
+            queryset = queryset.order_by(f'-{created}', f'-{pk}')
+        else:
+            queryset = queryset.order_by(created, pk)
+        rows = queryset[:self.per_page + 1]
+        if unwrap:
+            return [getattr(row, unwrap) for row in rows]
+        return list(rows)
+
+    def _unique(self, rows):
+        seen = set()
+        for row in rows:
+            key = self.key(row)
+            if key not in seen:
+                seen.add(key)
+                yield row
+
+    def cursor_page(self):
+        forward = not self.before
+        descending = forward == self.descending
+        merged = heapq.merge(
+            *(
+                self._fetch(queryset, keys, unwrap, descending)
+                for queryset, keys, unwrap in self.sources
+            ),
+            key=self.key,
+            reverse=descending,
+        )
+        rows = list(islice(self._unique(merged), self.per_page + 1))
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if forward:
+            has_next, has_previous = has_more, bool(self.after and rows)
+        else:
+            rows.reverse()
+            has_next, has_previous = bool(rows), has_more
+        if has_next:
+            self.next_cursor = self.encode(rows[-1])
+        if has_previous:
+            self.previous_cursor = self.encode(rows[0])
+        return Page(rows, 1, self)
+
+
+def paginate(request, object_list, per_page=PAGE_CONST, fallback=None,
+             **options):
+    """Возвращает страницу ленты.
+
+    Старые ссылки вида ?page=N обслуживает обычный Paginator
+    по object_list или, если он задан, по fallback; все остальные
+    запросы идут по курсорам ?after= и ?before=.
+    """
+    page_number = request.GET.get('page')
+    if page_number is not None:
+        if fallback is None:
+            fallback = object_list
+        return Paginator(fallback, per_page).get_page(page_number)
+    return CursorPaginator(
+        object_list,
+        per_page,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        **options,
+    ).cursor_page()
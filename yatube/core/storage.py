@@ -0,0 +1,150 @@
+"""Хранилище картинок с именами по содержимому.
+
+Файл сохраняется под именем из sha256 содержимого, поэтому
+одинаковые картинки разных постов лежат на диске одним файлом
+и делят миниатюры и варианты. Сколько постов ссылается на файл,
+считает таблица Blob; файл удаляется, когда ссылок не осталось.
+
+Загрузка закрепляет файл в той же строке Blob, пока пост
+ещё не сослался на него: иначе удаление последней ссылки
+могло бы стереть файл, запись которого загрузка только что
+пропустила, потому что файл уже был.
+"""
+import hashlib
+import os
+import re
+import uuid
+from datetime import timedelta
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F, Q
+from django.dispatch import Signal
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+from .models import Blob
+from .tasks import enqueue
+
+CHUNK_SIZE = 64 * 1024
+
+# Сколько секунд загрузка держит файл, пока пост не сошлётся на него
+PIN_TIMEOUT = 10 * 60
+
+# Файл без ссылок удалён: производные от него пора убрать
+blob_deleted = Signal(providing_args=['name'])
+
+HASHED_NAME = re.compile(r'(?:^|/)[0-9a-f]{2}/([0-9a-f]{64})(?:\.\w+)?$')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище, где имя файла — хеш его содержимого.
+
+    Каталог из upload_to сохраняется: posts/ab/<sha256>.gif.
+    Если такой файл уже есть, повторно он не записывается.
+    """
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks(CHUNK_SIZE):
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, digest[:2], digest + extension)
+
+    def digest(self, name):
+        """sha256 из имени файла или None для файла с обычным именем."""
+        match = HASHED_NAME.search(name)
+        return match and match.group(1)
+
+    def get_available_name(self, name, max_length=None):
+        # Уникальность даёт хеш; имя из upload_to всё равно заменится
+        return name
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, content)
+        with transaction.atomic():
+            # Закрепление пишет строку Blob до проверки файла. Удаление,
+            # начатое раньше, к этому моменту уже убрало файл, и он
+            # запишется заново; начатое позже увидит закрепление
+            self.pin(name)
+            if self.exists(name):
+                return name
+            # Файл пишется под временным именем и переименовывается
+            # целиком: параллельная загрузка не увидит половину файла
+            partial = super()._save(f'{name}.{uuid.uuid4().hex}.part', content)
+            os.replace(self.path(partial), self.path(name))
+        return name
+
+    def _ensure_row(self, name):
+        Blob.objects.bulk_create([Blob(name=name)], ignore_conflicts=True)
+
+    def pin(self, name):
+        """Не даёт удалить файл PIN_TIMEOUT секунд."""
+        self._ensure_row(name)
+        Blob.objects.filter(name=name).update(
+            pinned_until=timezone.now() + timedelta(seconds=PIN_TIMEOUT)
+        )
+
+    def acquire(self, name):
+        """Добавляет ссылку на файл с именем по содержимому."""
+        if not self.digest(name):
+            return
+        self._ensure_row(name)
+        Blob.objects.filter(name=name).update(refs=F('refs') + 1)
+
+    def release(self, name):
+        """Убирает ссылку на файл; без ссылок файл удаляется.
+
+        Удаление проверяется после фиксации транзакции. Файлы
+        с обычными именами, сохранённые до этого хранилища,
+        не считаются и не удаляются: на них может ссылаться что угодно.
+        """
+        if not self.digest(name):
+            return
+        Blob.objects.filter(name=name).update(refs=F('refs') - 1)
+        transaction.on_commit(lambda: self.collect(name))
+
+    def collect(self, name):
+        """Удаляет файл без ссылок и закреплений.
+
+        Строка Blob удаляется первой и держит блокировку, пока
+        удаляется файл, поэтому закрепление из параллельной загрузки
+        ждёт и потом пишет файл заново. Закреплённый файл проверяется
+        ещё раз задачей очереди, когда закрепление истечёт.
+        Возвращает True, если файл удалён.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            removed, _ = Blob.objects.filter(
+                Q(pinned_until__isnull=True) | Q(pinned_until__lte=now),
+                name=name,
+                refs__lte=0,
+            ).delete()
+            if removed:
+                self.delete(name)
+        if removed:
+            blob_deleted.send(sender=type(self), name=name)
+            return True
+        pinned_until = Blob.objects.filter(
+            name=name, refs__lte=0
+        ).values_list('pinned_until', flat=True).first()
+        if pinned_until:
+            enqueue(
+                collect_blob, name,
+                key=f'blob:{name}',
+                delay=(pinned_until - now).total_seconds(),
+            )
+        return False
+
+
+content_storage = ContentAddressedStorage()
+
+
+def collect_blob(name):
+    """Задача очереди: удаляет файл, если закрепление истекло."""
+    content_storage.collect(name)
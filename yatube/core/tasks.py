@@ -0,0 +1,132 @@
+"""Очередь фоновых задач в таблице core_task.
+
+Задача — вызов функции уровня модуля с аргументами, которые
+переводятся в JSON. Команда runworker забирает готовые задачи
+пачками в аренду (lease) и выполняет их в пуле потоков.
+Запись удаляется только после успешного выполнения: если
+обработчик упал вместе с процессом, аренда истечёт и задачу
+возьмёт другой обработчик. Поэтому задача выполняется хотя бы раз
+и может выполниться повторно — функции задач должны это выдерживать.
+"""
+import json
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+
+def func_path(func):
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def enqueue(func, *args, key=None, priority=0, delay=0):
+    """Добавляет задачу func(*args) в очередь.
+
+    Пока задача с тем же key есть в очереди, повтор не добавляется.
+    Задачи с большим priority выполняются раньше; delay — через
+    сколько секунд задачу можно брать.
+    """
+    task = Task(
+        func=func_path(func),
+        args=json.dumps(args),
+        key=key,
+        priority=priority,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    Task.objects.bulk_create([task], ignore_conflicts=True)
+
+
+def defer(func, *args, **options):
+    """Как enqueue, но после фиксации текущей транзакции.
+
+    Задача не появится в очереди, если транзакция откатится,
+    и обработчик не прочитает данные, которые ещё не записаны.
+    """
+    transaction.on_commit(lambda: enqueue(func, *args, **options))
+
+
+def ready(now):
+    return Task.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+        failed=False,
+        run_at__lte=now,
+    )
+
+
+def claim(limit):
+    """Берёт в аренду до limit готовых задач, важные первыми."""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    with transaction.atomic():
+        ids = list(
+            ready(now).order_by(
+                '-priority', 'run_at', 'id'
+            ).values_list('id', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        # Повторная проверка аренды в UPDATE: задачи, которые успел
+        # забрать другой обработчик, не достанутся этому
+        ready(now).filter(id__in=ids).update(
+            locked_by=token,
+            locked_until=now + timedelta(seconds=settings.TASK_LEASE),
+            attempts=F('attempts') + 1,
+        )
+    return list(
+        Task.objects.filter(locked_by=token).order_by(
+            '-priority', 'run_at', 'id'
+        )
+    )
+
+
+def execute(task):
+    """Выполняет задачу, взятую в аренду, и убирает её из очереди.
+
+    Упавшая задача откладывается с экспоненциальной задержкой,
+    после TASK_MAX_ATTEMPTS попыток помечается failed и больше
+    не выполняется; её key освобождается для новых задач.
+    """
+    try:
+        import_string(task.func)(*json.loads(task.args))
+    except Exception:
+        logger.exception('Task %s %s failed', task.pk, task.func)
+        error = traceback.format_exc()
+        mine = Task.objects.filter(pk=task.pk, locked_by=task.locked_by)
+        if task.attempts >= settings.TASK_MAX_ATTEMPTS:
+            mine.update(
+                failed=True, key=None, error=error, locked_until=None
+            )
+        else:
+            delay = settings.TASK_RETRY_DELAY * 2 ** (task.attempts - 1)
+            mine.update(
+                run_at=timezone.now() + timedelta(seconds=delay),
+                error=error,
+                locked_until=None,
+            )
+    else:
+        Task.objects.filter(pk=task.pk, locked_by=task.locked_by).delete()
+
+
+def run_pending():
+    """Выполняет в текущем потоке все готовые задачи; для тестов и команд.
+
+    Возвращает число выполненных задач.
+    """
+    done = 0
+    while True:
+        tasks = claim(settings.TASK_BATCH_SIZE)
+        if not tasks:
+            return done
+        for task in tasks:
+            execute(task)
+            done += 1
@@ -0,0 +1,31 @@
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+def isolated_cache():
+    """Свой пустой кэш в памяти на время тестов.
+
+    Кэш сайта может быть общим и жить между запусками, а id
+    в тестовой базе каждый раз начинаются заново: без отдельного
+    кэша тесты видели бы страницы и версии прошлых прогонов.
+    """
+    return override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'tests',
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        },
+    })
+
+
+class TestRunner(DiscoverRunner):
+    """manage.py test с кэшем из isolated_cache."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_settings = isolated_cache()
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        super().teardown_test_environment(**kwargs)
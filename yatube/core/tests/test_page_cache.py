@@ -0,0 +1,69 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase
+
+from .. import page_cache
+from ..middleware import AnonymousPageCacheMiddleware
+
+
+class PageCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().get('/page/')
+        self.request.user = AnonymousUser()
+
+    def render(self, purge_during=False):
+        def view(request):
+            response = HttpResponse('page')
+            if purge_during:
+                page_cache.purge('post:1')
+            return page_cache.add_surrogate_keys(response, 'post:1')
+        AnonymousPageCacheMiddleware(view)(self.request)
+
+    def test_page_stored(self):
+        self.render()
+        self.assertIsNotNone(page_cache.get_page(self.request))
+
+    def test_purge_while_rendering_skips_store(self):
+        """Страница, при сборке которой сбросили её ключ,
+        могла прочитать старые данные и в кэш не кладётся."""
+        self.render(purge_during=True)
+        self.assertIsNone(page_cache.get_page(self.request))
+
+    def test_tagged_value_purged_after_read_skipped(self):
+        """Значение, ключ которого сбросили после чтения из базы,
+        set_tagged не кладёт, остальные кладёт."""
+        since = time.time_ns()
+        page_cache.purge('post:1')
+        page_cache.set_tagged({
+            'stale': ('old', ['post:1']),
+            'fresh': ('new', ['post:2']),
+        }, since)
+        self.assertEqual(
+            page_cache.get_tagged(['stale', 'fresh']), {'fresh': 'new'}
+        )
+
+
+class PurgeOnCommitTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_purge_repeats_after_commit(self):
+        """Страница, собранная до фиксации, устаревает после неё."""
+        key = page_cache._tag_key('post:1')
+        with transaction.atomic():
+            page_cache.purge('post:1')
+            inside = cache.get(key)
+        self.assertGreater(cache.get(key), inside)
+
+    def test_rollback_keeps_single_purge(self):
+        key = page_cache._tag_key('post:1')
+        with transaction.atomic():
+            page_cache.purge('post:1')
+            inside = cache.get(key)
+            transaction.set_rollback(True)
+        self.assertEqual(cache.get(key), inside)
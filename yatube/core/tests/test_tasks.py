@@ -0,0 +1,88 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Task
+from ..tasks import claim, enqueue, execute, run_pending
+
+calls = []
+
+
+def remember(value):
+    calls.append(value)
+
+
+def explode():
+    raise RuntimeError('boom')
+
+
+@override_settings(TASK_MAX_ATTEMPTS=2, TASK_RETRY_DELAY=10)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_run_in_priority_order(self):
+        enqueue(remember, 'low')
+        enqueue(remember, 'high', priority=5)
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(calls, ['high', 'low'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_key_deduplicates_queued_tasks(self):
+        enqueue(remember, 1, key='same')
+        enqueue(remember, 2, key='same')
+        run_pending()
+        self.assertEqual(calls, [1])
+        enqueue(remember, 3, key='same')
+        run_pending()
+        self.assertEqual(calls, [1, 3])
+
+    def test_delayed_task_waits(self):
+        enqueue(remember, 'later', delay=60)
+        self.assertEqual(run_pending(), 0)
+
+    def test_claimed_task_not_claimed_twice(self):
+        """Задача в аренде достаётся одному обработчику, пока аренда
+        не истекла, и возвращается в очередь, если обработчик пропал."""
+        enqueue(remember, 'once')
+        self.assertEqual(len(claim(10)), 1)
+        self.assertEqual(claim(10), [])
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        [task] = claim(10)
+        self.assertEqual(task.attempts, 2)
+
+    def test_failed_task_retried_then_given_up(self):
+        enqueue(explode, key='explode')
+        with self.assertLogs('core.tasks', 'ERROR'):
+            run_pending()
+        task = Task.objects.get()
+        self.assertEqual(task.attempts, 1)
+        self.assertFalse(task.failed)
+        self.assertIn('RuntimeError: boom', task.error)
+        self.assertGreater(task.run_at, timezone.now())
+        Task.objects.update(run_at=timezone.now())
+        [task] = claim(10)
+        with self.assertLogs('core.tasks', 'ERROR'):
+            execute(task)
+        task.refresh_from_db()
+        self.assertTrue(task.failed)
+        self.assertIsNone(task.key)
+        self.assertEqual(claim(10), [])
+
+    def test_runworker_once(self):
+        for value in range(3):
+            enqueue(remember, value)
+        out = StringIO()
+        call_command('runworker', once=True, threads=1, stdout=out)
+        self.assertEqual(sorted(calls), [0, 1, 2])
+        self.assertIn('Выполнено задач: 3', out.getvalue())
+
+    def test_args_stored_as_json(self):
+        enqueue(remember, {'a': [1, 2]})
+        task = Task.objects.get()
+        self.assertEqual(task.func, 'core.tests.test_tasks.remember')
+        self.assertEqual(json.loads(task.args), [{'a': [1, 2]}])
@@ -0,0 +1,19 @@
+from unittest import mock
+
+from django.db import transaction
+
+
+def run_on_commit():
+    """TestCase не фиксирует транзакции: колбэки вызываются сразу."""
+    return mock.patch.object(transaction, 'on_commit', lambda func: func())
+
+
+class RunOnCommitMixin:
+    """run_on_commit на весь класс, включая данные из setUpClass."""
+
+    @classmethod
+    def setUpClass(cls):
+        patcher = run_on_commit()
+        patcher.start()
+        cls.addClassCleanup(patcher.stop)
+        super().setUpClass()
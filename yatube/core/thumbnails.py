@@ -0,0 +1,214 @@
+"""Миниатюры без работы с картинками в запросе.
+
+Бэкенд sorl-thumbnail отдаёт только готовые миниатюры из KV-хранилища.
+Пока миниатюры нет, шаблон получает заглушку того же размера,
+а саму миниатюру строит обработчик очереди задач. Записи KV-хранилища
+для целой страницы ленты читаются заранее одним запросом.
+"""
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, cache, caches
+from django.dispatch import Signal
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as thumbnail_defaults
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.helpers import get_module_class, serialize, tokey
+from sorl.thumbnail.images import (DummyImageFile, ImageFile,
+                                   deserialize_image_file)
+from sorl.thumbnail.kvstores.base import KVStoreBase, add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from .tasks import defer
+
+PLACEHOLDER_COLOR = '#e9ecef'
+
+# Отсутствие записи тоже кэшируется, но ненадолго: запись
+# появится, когда обработчик очереди построит миниатюру
+MISSING = ''
+MISSING_TIMEOUT = 60
+
+# Миниатюра картинки name построена: страницы, закэшированные
+# с заглушкой, пора сбросить
+thumbnail_ready = Signal(providing_args=['name'])
+
+
+class Placeholder(DummyImageFile):
+    """Серый прямоугольник размера миниатюры в data: URL."""
+
+    @property
+    def url(self):
+        svg = (
+            f'<svg xmlns="http://www.w3.org/2000/svg" '
+            f'width="{self.x}" height="{self.y}">'
+            f'<rect width="100%" height="100%" fill="{PLACEHOLDER_COLOR}"/>'
+            f'</svg>'
+        )
+        return 'data:image/svg+xml,' + quote(svg)
+
+
+class PregeneratedBackend(ThumbnailBackend):
+    """Бэкенд, который в запросе только читает KV-хранилище."""
+
+    def thumbnail_file(self, file_, geometry_string, options):
+        """Файл миниатюры с тем же именем, что построит sorl.
+
+        Дополняет options так же, как ThumbnailBackend.get_thumbnail,
+        но не открывает ни исходник, ни миниатюру.
+        """
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(thumbnail_defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        thumbnail = self.thumbnail_file(file_, geometry_string, dict(options))
+        prefetched = getattr(file_, 'prefetched_thumbnails', {})
+        if thumbnail.key in prefetched:
+            cached = prefetched[thumbnail.key]
+        else:
+            cached = default.kvstore.get(thumbnail)
+        if cached:
+            return cached
+        schedule(file_, [(geometry_string, options)])
+        return Placeholder(geometry_string)
+
+    def generate(self, file_, geometry_string, **options):
+        """Строит миниатюру сразу — для фоновых потоков и команд."""
+        thumbnail = super().get_thumbnail(file_, geometry_string, **options)
+        thumbnail_ready.send(sender=type(self), name=file_.name)
+        return thumbnail
+
+
+class KVStore(KVStoreBase):
+    """KV-хранилище sorl в кэше Django с таблицей sorl как запасом.
+
+    В отличие от cached_db_kvstore умеет читать много записей сразу:
+    один get_many из кэша и один запрос к базе на промахи.
+    """
+
+    @property
+    def cache(self):
+        try:
+            return caches[thumbnail_settings.THUMBNAIL_CACHE]
+        except InvalidCacheBackendError:
+            return cache
+
+    def _get_raw_many(self, keys):
+        found = self.cache.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            stored = dict(
+                KVStoreModel.objects.filter(
+                    key__in=missing
+                ).values_list('key', 'value')
+            )
+            self.cache.set_many(
+                stored, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT
+            )
+            self.cache.set_many(
+                {key: MISSING for key in missing if key not in stored},
+                MISSING_TIMEOUT,
+            )
+            found.update(stored)
+        return {key: value for key, value in found.items() if value}
+
+    def get_many(self, image_files):
+        """Словарь key -> ImageFile или None для всех image_files."""
+        raw = self._get_raw_many(
+            [add_prefix(image_file.key) for image_file in image_files]
+        )
+        found = {}
+        for image_file in image_files:
+            value = raw.get(add_prefix(image_file.key))
+            found[image_file.key] = value and deserialize_image_file(value)
+        return found
+
+    def _get_raw(self, key):
+        return self._get_raw_many([key]).get(key)
+
+    def _set_raw(self, key, value):
+        KVStoreModel.objects.update_or_create(
+            key=key, defaults={'value': value}
+        )
+        self.cache.set(
+            key, value, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT
+        )
+
+    def _delete_raw(self, *keys):
+        KVStoreModel.objects.filter(key__in=keys).delete()
+        self.cache.delete_many(keys)
+
+    def _find_keys_raw(self, prefix):
+        return KVStoreModel.objects.filter(
+            key__startswith=prefix
+        ).values_list('key', flat=True)
+
+
+def prefetch_thumbnails(objects, field='image', geometries=None):
+    """Читает записи миниатюр всех объектов страницы одним заходом.
+
+    Найденное кладётся в prefetched_thumbnails файла картинки,
+    и тег {% thumbnail %} берёт его оттуда, не обращаясь к хранилищу.
+    Размеры по умолчанию — THUMBNAIL_PREGENERATE, как в шаблонах.
+    """
+    if geometries is None:
+        geometries = settings.THUMBNAIL_PREGENERATE
+    wanted = []
+    for obj in objects:
+        file_ = getattr(obj, field)
+        if not file_:
+            continue
+        for geometry_string, options in geometries:
+            thumbnail = default.backend.thumbnail_file(
+                file_, geometry_string, dict(options)
+            )
+            wanted.append((file_, thumbnail))
+    if not wanted:
+        return
+    found = default.kvstore.get_many([thumbnail for _, thumbnail in wanted])
+    for file_, thumbnail in wanted:
+        if not hasattr(file_, 'prefetched_thumbnails'):
+            file_.prefetched_thumbnails = {}
+        file_.prefetched_thumbnails[thumbnail.key] = found[thumbnail.key]
+
+
+def generate(name, storage, geometry_string, options):
+    """Задача очереди: строит миниатюру файла name из хранилища storage."""
+    source = ImageFile(name, get_module_class(storage)())
+    default.backend.generate(source, geometry_string, **options)
+
+
+def schedule(file_, geometries=None):
+    """Ставит построение миниатюр file_ в очередь задач.
+
+    По умолчанию строятся все размеры из THUMBNAIL_PREGENERATE.
+    Задачи уходят после фиксации транзакции, чтобы обработчик
+    не читал файл поста, запись о котором ещё может откатиться;
+    одинаковые задачи, ещё не выполненные, не дублируются.
+    Хранилище файла запоминается: от него зависит имя миниатюры.
+    """
+    if not file_:
+        return
+    source = ImageFile(file_)
+    if geometries is None:
+        geometries = settings.THUMBNAIL_PREGENERATE
+    for geometry_string, options in geometries:
+        defer(
+            generate,
+            source.name, source.serialize_storage(), geometry_string, options,
+            key='thumbnail:' + tokey(
+                source.key, geometry_string, serialize(options)
+            ),
+            priority=settings.THUMBNAIL_TASK_PRIORITY,
+        )
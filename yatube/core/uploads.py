@@ -0,0 +1,141 @@
+"""Загрузка картинок с ограничениями по байтам и пикселям.
+
+Обработчик проверяет размер файла и размеры картинки из заголовка,
+пока файл ещё принимается, и не держит его в памяти целиком.
+Отклонённый файл помечается upload_error, а форма превращает
+пометку в ошибку поля.
+"""
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+# Сколько первых байт файла читать в поисках размеров картинки
+HEADER_LIMIT = 256 * 1024
+
+# Форматы, которые пересохраняются без метаданных, и параметры записи
+REENCODE = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+}
+
+
+# Форматы, которые декодируются сразу уменьшенными (draft)
+DRAFT_FORMATS = {'JPEG'}
+
+
+def max_pixels(fmt):
+    """Лимит пикселей формата fmt.
+
+    Остальные форматы при пересохранении декодируются целиком,
+    поэтому их лимит ниже: он и задаёт память на одну загрузку.
+    """
+    if fmt in DRAFT_FORMATS:
+        return settings.IMAGE_UPLOAD_MAX_PIXELS
+    return min(
+        settings.IMAGE_UPLOAD_MAX_PIXELS,
+        settings.IMAGE_UPLOAD_MAX_DECODED_PIXELS,
+    )
+
+
+def check_pixels(size, fmt=None):
+    """Сообщение об ошибке, если в картинке больше пикселей, чем можно."""
+    width, height = size
+    limit = max_pixels(fmt)
+    if width * height > limit:
+        return (
+            f'Картинка {width}×{height} слишком большая: не больше '
+            f'{limit} пикселей'
+        )
+    return None
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку во временный файл и следит за лимитами.
+
+    Как только файл превысил IMAGE_UPLOAD_MAX_BYTES или по заголовку
+    стало видно, что в картинке слишком много пикселей, остаток
+    файла отбрасывается, а сам файл получает upload_error.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.header = b''
+        self.error = None
+
+    def _check_header(self, raw_data):
+        self.header += raw_data
+        try:
+            with Image.open(BytesIO(self.header)) as image:
+                size, fmt = image.size, image.format
+        except Image.DecompressionBombError as error:
+            self.header = None
+            self.error = str(error)
+            return
+        except Exception:
+            # Заголовок ещё не дочитан или это вовсе не картинка:
+            # тогда её отклонит проверка формы
+            if len(self.header) >= HEADER_LIMIT:
+                self.header = None
+            return
+        self.header = None
+        self.error = check_pixels(size, fmt)
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.error:
+            return None
+        self.received += len(raw_data)
+        if self.received > settings.IMAGE_UPLOAD_MAX_BYTES:
+            self.error = (
+                'Файл слишком большой: не больше '
+                f'{filesizeformat(settings.IMAGE_UPLOAD_MAX_BYTES)}'
+            )
+            return None
+        if self.header is not None:
+            self._check_header(raw_data)
+            if self.error:
+                return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        upload.upload_error = self.error
+        return upload
+
+
+def sanitize_image(upload):
+    """Пересохраняет картинку без EXIF и других метаданных.
+
+    Длинная сторона уменьшается до IMAGE_UPLOAD_MAX_SIDE, и только
+    потом поворот из EXIF применяется к пикселям, так что копия
+    для поворота уже маленькая. JPEG сразу декодируется
+    в уменьшенном виде (draft), остальные форматы — целиком,
+    их размер ограничен IMAGE_UPLOAD_MAX_DECODED_PIXELS. GIF
+    отдаётся как есть, чтобы не потерять анимацию, метаданных EXIF
+    в нём нет.
+    """
+    max_side = settings.IMAGE_UPLOAD_MAX_SIDE
+    upload.seek(0)
+    with Image.open(upload) as source:
+        fmt = source.format
+        if fmt not in REENCODE:
+            upload.seek(0)
+            return upload
+        error = check_pixels(source.size, fmt)
+        if error:
+            raise ValueError(error)
+        source.draft('RGB', (max_side, max_side))
+        source.thumbnail((max_side, max_side), Image.LANCZOS)
+        image = ImageOps.exif_transpose(source)
+        if fmt == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        buffer = BytesIO()
+        image.save(buffer, fmt, **REENCODE[fmt])
+    return InMemoryUploadedFile(
+        buffer, None, upload.name, Image.MIME[fmt], buffer.tell(), None
+    )
@@ -0,0 +1,136 @@
+"""Адаптивные варианты картинок для srcset.
+
+Варианты строятся один раз по содержимому файла: имя зависит
+от sha256 картинки, ширины и формата, поэтому одинаковые картинки
+разных постов делят одни и те же файлы.
+"""
+import base64
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+from .storage import content_storage
+
+CHUNK_SIZE = 64 * 1024
+
+# Ширина размытой заглушки: пара сотен байт в data: URL
+PLACEHOLDER_WIDTH = 16
+
+# Формат Pillow, расширение файла и MIME-тип
+FORMATS = {
+    'webp': ('WEBP', 'webp', 'image/webp'),
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg'),
+}
+
+
+def content_hash(name):
+    """sha256 файла из хранилища, читается кусками.
+
+    Для файла с именем по содержимому хеш берётся из имени.
+    """
+    digest = content_storage.digest(name)
+    if digest:
+        return digest
+    digest = hashlib.sha256()
+    with default_storage.open(name, 'rb') as file_:
+        for chunk in file_.chunks(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def available_formats():
+    """Форматы из IMAGE_VARIANT_FORMATS, которые умеет кодировать Pillow."""
+    return [
+        fmt for fmt in settings.IMAGE_VARIANT_FORMATS
+        if fmt != 'webp' or features.check('webp')
+    ]
+
+
+def variant_name(digest, width, fmt):
+    extension = FORMATS[fmt][1]
+    return f'variants/{digest[:2]}/{digest}/{width}.{extension}'
+
+
+def variant_size(width):
+    ratio_width, ratio_height = settings.IMAGE_VARIANT_RATIO
+    return width, round(width * ratio_height / ratio_width)
+
+
+def describe(file_):
+    """Ширина, высота и размытая заглушка (LQIP) картинки.
+
+    Заглушка — JPEG шириной PLACEHOLDER_WIDTH в пропорциях
+    вариантов, закодированный в data: URL.
+    """
+    file_.seek(0)
+    with Image.open(file_) as source:
+        image = ImageOps.exif_transpose(source)
+        width, height = image.size
+        ratio_width, ratio_height = settings.IMAGE_VARIANT_RATIO
+        size = (
+            PLACEHOLDER_WIDTH,
+            max(1, round(PLACEHOLDER_WIDTH * ratio_height / ratio_width)),
+        )
+        tiny = ImageOps.fit(image.convert('RGB'), size, Image.BILINEAR)
+    file_.seek(0)
+    buffer = BytesIO()
+    tiny.save(buffer, 'JPEG', quality=40)
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return width, height, f'data:image/jpeg;base64,{encoded}'
+
+
+def build(name, digest):
+    """Сохраняет недостающие варианты картинки, возвращает их имена."""
+    wanted = [
+        (width, fmt)
+        for width in settings.IMAGE_VARIANT_WIDTHS
+        for fmt in available_formats()
+        if not default_storage.exists(variant_name(digest, width, fmt))
+    ]
+    if not wanted:
+        return []
+    with default_storage.open(name, 'rb') as file_:
+        with Image.open(file_) as source:
+            image = ImageOps.exif_transpose(source).convert('RGB')
+    built = []
+    for width, fmt in wanted:
+        variant = ImageOps.fit(image, variant_size(width), Image.LANCZOS)
+        buffer = BytesIO()
+        variant.save(buffer, FORMATS[fmt][0], quality=80, optimize=True)
+        variant_file = variant_name(digest, width, fmt)
+        # Другой поток мог успеть сохранить тот же вариант
+        if not default_storage.exists(variant_file):
+            default_storage.save(variant_file, ContentFile(buffer.getvalue()))
+        built.append(variant_file)
+    return built
+
+
+def remove(digest):
+    """Удаляет все варианты картинки с хешем digest."""
+    for width in settings.IMAGE_VARIANT_WIDTHS:
+        for fmt in FORMATS:
+            default_storage.delete(variant_name(digest, width, fmt))
+
+
+def srcset(digest, fmt):
+    return ', '.join(
+        f'{default_storage.url(variant_name(digest, width, fmt))} {width}w'
+        for width in settings.IMAGE_VARIANT_WIDTHS
+    )
+
+
+def fallback_url(digest):
+    """Самый широкий JPEG — для браузеров без srcset."""
+    width = max(settings.IMAGE_VARIANT_WIDTHS)
+    return default_storage.url(variant_name(digest, width, 'jpeg'))
+
+
+def sources(digest):
+    """(MIME-тип, srcset) для всех форматов, лучший формат первым."""
+    return [
+        (FORMATS[fmt][2], srcset(digest, fmt)) for fmt in available_formats()
+    ]
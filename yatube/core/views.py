@@ -1,8 +1,35 @@
 from django.shortcuts import render
+from django.urls import reverse
+from search import fuzzy
+
+# Страницы, на которые попадают, набирая имя вручную: по опечатке
+# в адресе 404 подсказывает похожих пользователей и группы
+SUGGESTIONS = {
+    'profile': ('user', 'username'),
+    'group_list': ('group', 'slug'),
+}
+SUGGESTIONS_LIMIT = 5
+
+
+def _suggestions(request):
+    match = request.resolver_match
+    if match is None or match.url_name not in SUGGESTIONS:
+        return []
+    kind, argument = SUGGESTIONS[match.url_name]
+    return [
+        (label, reverse(match.view_name, args=[value]))
+        for _, _, label, value in fuzzy.lookup(
+            match.kwargs[argument], SUGGESTIONS_LIMIT, kind
+        )
+    ]
 
 
 def page_not_found(request, exception):
-    return render(request, 'core/404.html', {'path': request.path}, status=404)
+    context = {
+        'path': request.path,
+        'suggestions': _suggestions(request),
+    }
+    return render(request, 'core/404.html', context, status=404)
 
 
 def server_error(request):
@@ -1,3 +1,6 @@
+from importlib import import_module
+
+from django.conf import settings
 from django.contrib import admin
 
 from .models import Comment, Follow, Group, Post
@@ -10,7 +13,13 @@ class Post(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('created',)
     empty_value_display = '-пусто-'
-    pass
+
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по поисковому индексу вместо LIKE по всей таблице."""
+        if not search_term:
+            return queryset, False
+        matching = import_module(settings.SEARCH_BACKEND).matching
+        return queryset.filter(pk__in=matching(search_term)), False
 
 
 @admin.register(Group)
@@ -0,0 +1,71 @@
+import time
+
+from core.page_cache import purge
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .models import Group, Post, Tag, User
+from .tags import parse_name
+
+FEED_VERSION_KEY = 'posts:feed_version'
+
+
+def feed_version():
+    """Текущая версия лент, входит в ключ кэша фрагментов."""
+    return cache.get_or_set(FEED_VERSION_KEY, time.time_ns, None)
+
+
+def bump_feed_version():
+    """Делает устаревшими все закэшированные фрагменты лент.
+
+    Версией служит время, поэтому вытесненный из кэша счётчик
+    не совпадёт ни с одной из старых версий. Как и purge, внутри
+    транзакции версия меняется ещё раз после фиксации.
+    """
+    cache.set(FEED_VERSION_KEY, time.time_ns(), None)
+    if connection.in_atomic_block:
+        transaction.on_commit(
+            lambda: cache.set(FEED_VERSION_KEY, time.time_ns(), None)
+        )
+
+
+def post_keys(post):
+    """Ключи Surrogate-Key страницы поста."""
+    keys = [f'post:{post.pk}', f'author:{post.author_id}']
+    if post.group_id:
+        keys.append(f'group:{post.group_id}')
+    return keys
+
+
+def purge_post(post):
+    """Сбрасывает страницу поста и все ленты, где он виден."""
+    purge('feed', *post_keys(post))
+
+
+def index_scope(request):
+    return ['feed']
+
+
+def group_scope(request, slug):
+    group = Group.objects.filter(slug=slug).only('pk').first()
+    return group and [f'group:{group.pk}']
+
+
+def profile_scope(request, username):
+    author = User.objects.filter(username=username).only('pk').first()
+    return author and [f'author:{author.pk}']
+
+
+def post_scope(request, post_id):
+    post = Post.objects.filter(pk=post_id).only('author', 'group').first()
+    return post and post_keys(post)
+
+
+def tag_scope(request, name):
+    kind, name = parse_name(name)
+    tag = Tag.objects.filter(kind=kind, name=name).only('pk').first()
+    return tag and ['feed', f'tag:{tag.pk}']
+
+
+def follow_scope(request):
+    return ['feed', f'timeline:{request.user.pk}']
@@ -0,0 +1,60 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, User, UserStats
+
+
+def _count(queryset, field):
+    """Подзапрос с числом строк queryset, ссылающихся на внешний pk."""
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def bump_user(user_id, field, delta):
+    """Сдвигает счётчик пользователя на delta одним UPDATE."""
+    stats = UserStats.objects.filter(user_id=user_id)
+    if delta < 0:
+        stats = stats.filter(**{f'{field}__gte': -delta})
+    updated = stats.update(**{field: F(field) + delta})
+    if not updated and delta > 0:
+        reconcile_users(User.objects.filter(pk=user_id))
+
+
+def bump_comments(post_id, delta):
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comments_count__gte=-delta)
+    posts.update(comments_count=F('comments_count') + delta)
+
+
+def _repair(queryset, counts):
+    """Исправляет строки, где счётчики разошлись с подсчётом."""
+    drifted = queryset.annotate(
+        **{f'real_{field}': value for field, value in counts.items()}
+    ).exclude(
+        **{field: F(f'real_{field}') for field in counts}
+    )
+    return queryset.filter(pk__in=drifted.values('pk')).update(**counts)
+
+
+def reconcile_users(users):
+    UserStats.objects.bulk_create(
+        [UserStats(user=user) for user in users.filter(stats__isnull=True)],
+        ignore_conflicts=True,
+    )
+    return _repair(UserStats.objects.filter(user__in=users), {
+        'posts_count': _count(Post.objects, 'author'),
+        'followers_count': _count(Follow.objects, 'author'),
+        'following_count': _count(Follow.objects, 'user'),
+    })
+
+
+def reconcile():
+    """Пересчитывает все счётчики, возвращает число исправленных строк."""
+    repaired = reconcile_users(User.objects.all())
+    return repaired + _repair(Post.objects.all(), {
+        'comments_count': _count(Comment.objects, 'post'),
+    })
@@ -0,0 +1,134 @@
+"""Выгрузка постов и комментариев пользователя потоком.
+
+Строки читаются из базы кусками через iterator(), сериализуются
+по одной и сразу отдаются дальше, поэтому память не зависит
+от числа постов. Архив zip с картинками тоже пишется потоком:
+zipfile умеет писать в поток без перемотки.
+"""
+import csv
+import json
+import zipfile
+
+from .models import Comment, Post
+
+CHUNK_SIZE = 500
+FILE_CHUNK_SIZE = 64 * 1024
+
+FORMATS = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+CSV_COLUMNS = ('type', 'id', 'created', 'post', 'group', 'text', 'image')
+
+
+def records(user):
+    """Посты, затем комментарии пользователя словарями."""
+    posts = Post.objects.filter(author=user).order_by('pk').values_list(
+        'id', 'created', 'group__slug', 'text', 'image'
+    )
+    for pk, created, group, text, image in posts.iterator(CHUNK_SIZE):
+        yield {
+            'type': 'post',
+            'id': pk,
+            'created': created.isoformat(),
+            'group': group,
+            'text': text,
+            'image': image or None,
+        }
+    comments = Comment.objects.filter(author=user).order_by('pk').values_list(
+        'id', 'created', 'post_id', 'text'
+    )
+    for pk, created, post_id, text in comments.iterator(CHUNK_SIZE):
+        yield {
+            'type': 'comment',
+            'id': pk,
+            'created': created.isoformat(),
+            'post': post_id,
+            'text': text,
+        }
+
+
+class Echo:
+    """Файл для csv.writer, который возвращает записанное."""
+
+    def write(self, value):
+        return value
+
+
+def jsonl_lines(user):
+    for record in records(user):
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def csv_lines(user):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for record in records(user):
+        yield writer.writerow(
+            '' if record.get(column) is None else record[column]
+            for column in CSV_COLUMNS
+        )
+
+
+def lines(user, fmt):
+    """Строки выгрузки в формате fmt: jsonl или csv."""
+    return jsonl_lines(user) if fmt == 'jsonl' else csv_lines(user)
+
+
+class ZipStream:
+    """Приёмник для zipfile: копит записанное, пока его не заберут."""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """Отдаёт и забывает записанное с прошлого раза."""
+        if self.chunks:
+            data = b''.join(self.chunks)
+            self.chunks = []
+            yield data
+
+
+def zip_chunks(user, fmt):
+    """Архив с выгрузкой и картинками постов кусками байтов.
+
+    Одна картинка, общая для нескольких постов, кладётся один раз.
+    Размер записи заранее неизвестен, поэтому все записи пишутся
+    с полями ZIP64: иначе запись больше 2 ГиБ оборвалась бы ошибкой.
+    """
+    stream = ZipStream()
+    storage = Post._meta.get_field('image').storage
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(
+            f'{user.username}.{fmt}', 'w', force_zip64=True
+        ) as entry:
+            for line in lines(user, fmt):
+                entry.write(line.encode())
+                yield from stream.drain()
+        images = Post.objects.filter(author=user).exclude(
+            image=''
+        ).order_by('image').values_list('image', flat=True).distinct()
+        for name in images.iterator(CHUNK_SIZE):
+            if not storage.exists(name):
+                continue
+            with storage.open(name, 'rb') as source:
+                with archive.open(
+                    f'images/{name}', 'w', force_zip64=True
+                ) as entry:
+                    for chunk in source.chunks(FILE_CHUNK_SIZE):
+                        entry.write(chunk)
+                        yield from stream.drain()
+    yield from stream.drain()
@@ -1,6 +1,9 @@
 from xml.etree.ElementTree import Comment
 
+from core.uploads import sanitize_image
+from core.variants import describe
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
 from .models import Comment, Post
 
@@ -10,6 +13,54 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    # Поля поста, которые пишет save(): поля формы и описание картинки
+    saved_fields = (
+        'text', 'group', 'image', 'image_hash',
+        'image_width', 'image_height', 'image_placeholder',
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Файл, отклонённый обработчиком загрузки, не отдаётся полю:
+        # вместо «битой картинки» форма покажет причину отказа
+        self.upload_error = None
+        upload = self.files.get('image')
+        if getattr(upload, 'upload_error', None):
+            self.upload_error = upload.upload_error
+            self.files = self.files.copy()
+            del self.files['image']
+
+    def clean_image(self):
+        if self.upload_error:
+            raise forms.ValidationError(self.upload_error)
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            try:
+                return sanitize_image(image)
+            except ValueError as error:
+                raise forms.ValidationError(str(error))
+        return image
+
+    def save(self, commit=True):
+        """Для новой картинки запоминает размеры и заглушку.
+
+        Картинка уже открыта при проверке формы, поэтому шаблонам
+        не нужно открывать файл; варианты для srcset строятся заново.
+        """
+        post = super().save(commit=False)
+        if 'image' in self.changed_data:
+            post.image_hash = ''
+            if post.image:
+                (post.image_width, post.image_height,
+                 post.image_placeholder) = describe(post.image.file)
+            else:
+                post.image_width = post.image_height = None
+                post.image_placeholder = ''
+        if commit:
+            post.save()
+            self.save_m2m()
+        return post
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
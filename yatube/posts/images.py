@@ -0,0 +1,58 @@
+from core import variants
+from core.storage import content_storage
+from core.tasks import defer
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from .caching import bump_feed_version, purge_post
+from .models import Post
+
+
+def build_variants(post_id, name):
+    """Строит варианты картинки поста и записывает её хеш.
+
+    Хеш записывается, только если картинка поста не сменилась,
+    пока строились варианты; после этого ленты перерисовываются
+    уже с srcset.
+    """
+    digest = variants.content_hash(name)
+    variants.build(name, digest)
+    posts = Post.objects.filter(pk=post_id, image=name)
+    if posts.update(image_hash=digest):
+        bump_feed_version()
+        purge_post(posts.only('author', 'group').get())
+
+
+def schedule_variants(post):
+    """Ставит построение вариантов картинки поста в очередь задач."""
+    if post.image and not post.image_hash:
+        defer(
+            build_variants, post.pk, post.image.name,
+            key=f'variants:{post.pk}:{post.image.name}',
+        )
+
+
+def acquire_image(name):
+    """Учитывает ещё один пост с картинкой name."""
+    content_storage.acquire(name)
+
+
+def release_image(name):
+    """Снимает ссылку поста на картинку name.
+
+    Когда на картинку больше не ссылается ни один пост, хранилище
+    удаляет файл, а drop_derived — производные от него.
+    """
+    content_storage.release(name)
+
+
+def drop_derived(name):
+    """Удаляет миниатюры удалённой картинки и, если тот же хеш
+    не записан у других постов, её варианты для srcset."""
+    if content_storage.exists(name):
+        # Картинку успели загрузить снова
+        return
+    default.kvstore.delete(ImageFile(name, content_storage))
+    digest = content_storage.digest(name)
+    if not Post.objects.filter(image_hash=digest).exists():
+        variants.remove(digest)
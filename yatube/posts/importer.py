@@ -0,0 +1,191 @@
+"""Загрузка постов из JSONL и CSV пачками.
+
+Файл читается построчно, посты пишутся bulk_create пачками,
+каждая пачка — отдельная транзакция вместе с отметкой о том,
+сколько строк файла уже прочитано. Сигналы при bulk_create
+не отправляются, поэтому теги, поисковый индекс, ленты подписок,
+счётчики и кэш обновляются здесь же, одним заходом на пачку.
+"""
+import csv
+import json
+from collections import Counter
+from itertools import islice
+
+from core.page_cache import purge
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from search import index
+
+from . import counters, tags, timeline
+from .caching import bump_feed_version
+from .models import Group, Post, PostImport, User
+
+BATCH_SIZE = 1000
+
+# Сколько авторов держать в памяти; при переполнении словарь
+# очищается, и авторы снова читаются из базы по мере надобности
+AUTHOR_CACHE_SIZE = 100000
+
+
+class RowError(ValueError):
+    pass
+
+
+def field(row, name):
+    """Строковое поле строки; '' вместо отсутствующего."""
+    value = row.get(name)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise RowError(f'неверное поле {name}')
+    return value
+
+
+def parse_created(value):
+    """Дата ISO 8601; без часового пояса считается текущим."""
+    try:
+        # Строка в формате ISO, но с невозможной датой
+        # (13-й месяц) даёт ValueError, а не None
+        created = parse_datetime(value)
+    except ValueError:
+        created = None
+    if created is None:
+        raise RowError('неверная дата')
+    if timezone.is_naive(created):
+        created = timezone.make_aware(created)
+    return created
+
+
+def read_rows(file_, fmt):
+    """Словари строк файла по одной; None вместо неразобранной строки."""
+    if fmt == 'csv':
+        yield from csv.DictReader(file_)
+        return
+    for line in file_:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else None
+
+
+class Importer:
+    """Загружает строки файла source в посты.
+
+    Строка — словарь с ключами author (имя пользователя),
+    text, необязательными group (слаг) и created (ISO 8601).
+    """
+
+    def __init__(self, source, batch_size=BATCH_SIZE):
+        self.source = source
+        self.batch_size = batch_size
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        self.authors = {}
+        self.skipped = Counter()
+
+    def resolve_authors(self, rows):
+        wanted = {
+            row.get('author') for row in rows
+            if row and isinstance(row.get('author'), str)
+        } - self.authors.keys() - {''}
+        if not wanted:
+            return
+        if len(self.authors) + len(wanted) > AUTHOR_CACHE_SIZE:
+            self.authors.clear()
+        found = dict(
+            User.objects.filter(username__in=wanted).values_list(
+                'username', 'id'
+            )
+        )
+        self.authors.update(found)
+
+    def build(self, row):
+        if not row:
+            raise RowError('не разобрать строку')
+        text = field(row, 'text').strip()
+        if not text:
+            raise RowError('нет текста')
+        author_id = self.authors.get(field(row, 'author'))
+        if author_id is None:
+            raise RowError('нет автора')
+        group_id = None
+        group = field(row, 'group')
+        if group:
+            group_id = self.groups.get(group)
+            if group_id is None:
+                raise RowError('нет группы')
+        created = field(row, 'created')
+        created = parse_created(created) if created else timezone.now()
+        return Post(
+            author_id=author_id, group_id=group_id,
+            text=text, created=created, fanned_out=True,
+        )
+
+    def insert(self, posts):
+        """Пишет посты пачки и всё, что при save сделали бы сигналы."""
+        # bulk_create ставит created текущее время (auto_now_add),
+        # даты из файла возвращаются следующим запросом
+        created = [post.created for post in posts]
+        Post.objects.bulk_create(posts, batch_size=self.batch_size)
+        if posts[0].pk is None:
+            # SQLite не возвращает id из bulk_create. Пачка пишется
+            # в транзакции, где после первого INSERT других писателей
+            # нет, поэтому последние len(posts) id — её посты
+            ids = Post.objects.order_by('-pk').values_list(
+                'pk', flat=True
+            )[:len(posts)]
+            for post, pk in zip(posts, reversed(list(ids))):
+                post.pk = pk
+        for post, value in zip(posts, created):
+            post.created = value
+        Post.objects.bulk_update(posts, ['created'])
+        touched_tags = tags.index_new(posts)
+        if index.is_enabled():
+            index.index_new(posts)
+        followers = timeline.fan_out_many(posts)
+        authors = Counter(post.author_id for post in posts)
+        for author_id, count in authors.items():
+            counters.bump_user(author_id, 'posts_count', count)
+        groups = {post.group_id for post in posts if post.group_id}
+        transaction.on_commit(lambda: purge(
+            'feed',
+            *(f'author:{pk}' for pk in authors),
+            *(f'group:{pk}' for pk in groups),
+            *(f'tag:{pk}' for pk in touched_tags),
+            *(f'timeline:{pk}' for pk in followers),
+        ))
+
+    def run(self, rows, restart=False):
+        """Загружает строки, пропуская уже загруженные.
+
+        Отдаёт (прочитано строк, загружено постов) после каждой пачки.
+        """
+        state, _ = PostImport.objects.get_or_create(source=self.source)
+        if restart:
+            state.rows = state.imported = 0
+            state.save()
+        self.resumed_from = state.rows
+        rows = islice(rows, state.rows, None)
+        while True:
+            chunk = list(islice(rows, self.batch_size))
+            if not chunk:
+                break
+            self.resolve_authors(chunk)
+            posts = []
+            for row in chunk:
+                try:
+                    posts.append(self.build(row))
+                except RowError as error:
+                    self.skipped[str(error)] += 1
+            with transaction.atomic():
+                if posts:
+                    self.insert(posts)
+                state.rows += len(chunk)
+                state.imported += len(posts)
+                state.save(update_fields=['rows', 'imported', 'updated'])
+            if posts:
+                bump_feed_version()
+            yield state.rows, state.imported
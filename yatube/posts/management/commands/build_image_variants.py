@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import build_variants
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит варианты для srcset всех картинок постов, где их нет.'
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').filter(
+            image_hash=''
+        ).values_list('id', 'image')
+        built = 0
+        for post_id, name in list(posts):
+            build_variants(post_id, name)
+            built += 1
+        self.stdout.write(f'Картинок с вариантами: {built}')
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.images import acquire_image
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки постов с обычными именами в хранилище '
+        'с именами по содержимому; одинаковые картинки сливаются в одну.'
+    )
+
+    def handle(self, *args, **options):
+        storage = Post._meta.get_field('image').storage
+        posts = Post.objects.exclude(image='').values_list('id', 'image')
+        moved = 0
+        for post_id, name in list(posts):
+            if storage.digest(name):
+                continue
+            try:
+                with storage.open(name, 'rb') as file_:
+                    hashed = storage.save(name, file_)
+            except OSError:
+                self.stderr.write(f'Нет файла {name} у поста {post_id}')
+                continue
+            with transaction.atomic():
+                if Post.objects.filter(pk=post_id, image=name).update(
+                    image=hashed
+                ):
+                    acquire_image(hashed)
+            if not Post.objects.filter(image=name).exists():
+                storage.delete(name)
+            moved += 1
+        self.stdout.write(
+            f'Перенесено картинок: {moved}. '
+            'Миниатюры для новых имён строит generate_thumbnails.'
+        )
@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты и комментарии пользователя в JSONL, CSV или zip.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--format', choices=tuple(export.FORMATS), default='jsonl'
+        )
+        parser.add_argument(
+            '--images', action='store_true',
+            help='zip-архив вместе с картинками постов',
+        )
+        parser.add_argument(
+            '--output', help='Файл; по умолчанию — стандартный вывод'
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f'Нет пользователя {options["username"]}')
+        if options['images']:
+            chunks = export.zip_chunks(user, options['format'])
+        else:
+            chunks = (
+                line.encode()
+                for line in export.lines(user, options['format'])
+            )
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                output.writelines(chunks)
+        else:
+            sys.stdout.buffer.writelines(chunks)
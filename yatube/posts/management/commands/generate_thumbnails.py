@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит миниатюры всех картинок постов, которых ещё нет.'
+
+    def handle(self, *args, **options):
+        images = Post.objects.exclude(image='').values_list(
+            'image', flat=True
+        ).distinct()
+        storage = Post._meta.get_field('image').storage
+        generated = 0
+        for name in images.iterator():
+            source = ImageFile(name, storage)
+            for geometry_string, thumbnail in settings.THUMBNAIL_PREGENERATE:
+                default.backend.generate(source, geometry_string, **thumbnail)
+            generated += 1
+        self.stdout.write(f'Картинок с миниатюрами: {generated}')
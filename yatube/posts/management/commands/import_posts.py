@@ -0,0 +1,55 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import BATCH_SIZE, Importer, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты из JSONL или CSV. Строка: author, text, '
+        'group, created. Повторный запуск продолжает прерванный импорт.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .jsonl или .csv')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='Формат файла, по умолчанию — по расширению',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Постов в одной транзакции',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать файл сначала, забыв о прошлом импорте',
+        )
+
+    def handle(self, *args, **options):
+        path = os.path.abspath(options['path'])
+        fmt = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'jsonl'
+        )
+        importer = Importer(path, batch_size=options['batch_size'])
+        started = time.monotonic()
+        try:
+            file_ = open(path, newline='', encoding='utf-8')
+        except OSError as error:
+            raise CommandError(error)
+        with file_:
+            progress = importer.run(
+                read_rows(file_, fmt), restart=options['restart']
+            )
+            for rows, imported in progress:
+                elapsed = time.monotonic() - started
+                read = rows - importer.resumed_from
+                rate = read / elapsed if elapsed else 0
+                self.stdout.write(
+                    f'Строк: {rows}, постов: {imported}, '
+                    f'{rate:.0f} строк/с'
+                )
+        for reason, count in importer.skipped.items():
+            self.stdout.write(f'Пропущено ({reason}): {count}')
+        self.stdout.write('Готово')
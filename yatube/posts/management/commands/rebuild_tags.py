@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import tags
+
+
+class Command(BaseCommand):
+    help = 'Заново извлекает хештеги и упоминания из всех постов.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            linked = tags.rebuild()
+        self.stdout.write(f'Связей постов с тегами: {linked}')
@@ -0,0 +1,69 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserStats = apps.get_model('posts', 'UserStats')
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    posts = dict(
+        Post.objects.order_by().values_list('author').annotate(models.Count('pk'))
+    )
+    followers = dict(
+        Follow.objects.order_by().values_list('author').annotate(models.Count('pk'))
+    )
+    following = dict(
+        Follow.objects.order_by().values_list('user').annotate(models.Count('pk'))
+    )
+    UserStats.objects.bulk_create(
+        (
+            UserStats(
+                user_id=pk,
+                posts_count=posts.get(pk, 0),
+                followers_count=followers.get(pk, 0),
+                following_count=following.get(pk, 0),
+            )
+            for pk in User.objects.values_list('pk', flat=True).iterator()
+        ),
+        batch_size=500,
+    )
+    comments = Comment.objects.order_by().values_list('post').annotate(
+        models.Count('pk')
+    )
+    for post_id, total in comments.iterator():
+        Post.objects.filter(pk=post_id).update(comments_count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0016_post_comment_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+            ],
+            options={
+                'verbose_name': 'User stats',
+                'verbose_name_plural': 'User stats',
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Комментариев'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_tags(apps, schema_editor):
+    from posts.tags import extract
+
+    Post = apps.get_model('posts', 'Post')
+    PostTag = apps.get_model('posts', 'PostTag')
+    Tag = apps.get_model('posts', 'Tag')
+    tags = {}
+    for post_id, text, created in Post.objects.values_list(
+        'id', 'text', 'created'
+    ).iterator():
+        links = []
+        for kind, name in extract(text):
+            if (kind, name) not in tags:
+                tags[kind, name] = Tag.objects.create(kind=kind, name=name).pk
+            links.append(
+                PostTag(tag_id=tags[kind, name], post_id=post_id, created=created)
+            )
+        PostTag.objects.bulk_create(links)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(verbose_name='Дата создания поста')),
+            ],
+            options={
+                'verbose_name': 'Post tag',
+                'verbose_name_plural': 'Post tags',
+                'ordering': ('-created', '-post'),
+            },
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('#', 'Хештег'), ('@', 'Упоминание')], max_length=1, verbose_name='Вид')),
+                ('name', models.CharField(max_length=150, verbose_name='Имя')),
+            ],
+            options={
+                'verbose_name': 'Tag',
+                'verbose_name_plural': 'Tags',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('kind', 'name'), name='unique_tag'),
+        ),
+        migrations.AddField(
+            model_name='posttag',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='posts.Post'),
+        ),
+        migrations.AddField(
+            model_name='posttag',
+            name='tag',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='posts.Tag'),
+        ),
+        migrations.AddIndex(
+            model_name='posttag',
+            index=models.Index(fields=['tag', '-created', '-post'], name='post_tag_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='posttag',
+            constraint=models.UniqueConstraint(fields=('tag', 'post'), name='unique_post_tag'),
+        ),
+        migrations.RunPython(fill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_hash',
+            field=models.CharField(blank=True, editable=False, help_text='sha256 картинки, когда её варианты для srcset готовы', max_length=64, verbose_name='Хеш картинки'),
+        ),
+    ]
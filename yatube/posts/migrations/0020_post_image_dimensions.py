@@ -0,0 +1,49 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:32
+
+from django.db import migrations, models
+
+
+def describe_images(apps, schema_editor):
+    from django.core.files.storage import default_storage
+
+    from core.variants import describe
+
+    Post = apps.get_model('posts', 'Post')
+    images = list(Post.objects.exclude(image='').values_list('id', 'image'))
+    for post_id, name in images:
+        try:
+            with default_storage.open(name, 'rb') as file_:
+                width, height, placeholder = describe(file_)
+        except (OSError, ValueError):
+            continue
+        Post.objects.filter(pk=post_id).update(
+            image_width=width,
+            image_height=height,
+            image_placeholder=placeholder,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_post_image_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Размытая копия картинки в data: URL', verbose_name='Заглушка картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина картинки'),
+        ),
+        migrations.RunPython(describe_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_post_image_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostImport',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, unique=True, verbose_name='Файл')),
+                ('rows', models.PositiveIntegerField(default=0, verbose_name='Прочитано строк')),
+                ('imported', models.PositiveIntegerField(default=0, verbose_name='Загружено постов')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Post import',
+                'verbose_name_plural': 'Post imports',
+            },
+        ),
+    ]
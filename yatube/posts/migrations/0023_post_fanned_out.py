@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_postimport'),
+    ]
+
+    operations = [
+        # Посты, созданные до очереди, уже разложены по лентам
+        migrations.AddField(
+            model_name='post',
+            name='fanned_out',
+            field=models.BooleanField(default=True, editable=False, help_text='Пока пост не разложен, лента подписок читает его сама', verbose_name='Разложен по лентам'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='fanned_out',
+            field=models.BooleanField(default=False, editable=False, help_text='Пока пост не разложен, лента подписок читает его сама', verbose_name='Разложен по лентам'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(fanned_out=False), fields=['author'], name='post_pending_fanout_idx'),
+        ),
+    ]
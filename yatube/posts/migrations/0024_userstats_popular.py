@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_popular(apps, schema_editor):
+    UserStats = apps.get_model('posts', 'UserStats')
+    UserStats.objects.filter(
+        followers_count__gt=settings.FANOUT_FOLLOWERS_LIMIT
+    ).update(popular=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_post_fanned_out'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='popular',
+            field=models.BooleanField(default=False, help_text='Посты читаются в ленты подписок при открытии', verbose_name='Популярный'),
+        ),
+        migrations.RunPython(fill_popular, migrations.RunPython.noop),
+    ]
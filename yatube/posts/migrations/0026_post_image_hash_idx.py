@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0025_post_image_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['image_hash'], name='post_image_hash_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from core.models import CreatedModel
+from core.storage import content_storage
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.db.models import F, Q
@@ -20,6 +21,28 @@ class Group(models.Model):
         return self.title
 
 
+FEED_FIELDS = (
+    'id', 'created', 'text', 'image', 'image_hash', 'image_placeholder',
+    'author', 'author__username', 'group', 'group__slug',
+)
+
+
+def feed_fields(prefix=''):
+    """Поля поста, которые читают шаблоны лент.
+
+    prefix нужен при выборке постов через связанную модель,
+    например 'post__' для записей ленты подписок.
+    """
+    return [f'{prefix}{field}' for field in FEED_FIELDS]
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для лент: автор и группа одним JOIN,
+        без колонок, которые шаблоны лент не читают."""
+        return self.select_related('author', 'group').only(*feed_fields())
+
+
 class Post(CreatedModel):
     text = models.TextField('Текст', help_text='Текст нового поста')
     author = models.ForeignKey(
@@ -38,10 +61,65 @@ class Post(CreatedModel):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=content_storage,
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', blank=True, null=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', blank=True, null=True, editable=False
+    )
+    image_placeholder = models.TextField(
+        'Заглушка картинки',
+        blank=True,
+        editable=False,
+        help_text='Размытая копия картинки в data: URL',
+    )
+    image_hash = models.CharField(
+        'Хеш картинки',
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text='sha256 картинки, когда её варианты для srcset готовы',
+    )
+    comments_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False,
+    )
+    fanned_out = models.BooleanField(
+        'Разложен по лентам',
+        default=False,
+        editable=False,
+        help_text='Пока пост не разложен, лента подписок читает его сама',
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['-created', '-id'], name='post_created_idx'
+            ),
+            models.Index(
+                fields=['author', '-created', '-id'],
+                name='post_author_created_idx',
+            ),
+            models.Index(
+                fields=['group', '-created', '-id'],
+                name='post_group_created_idx',
+            ),
+            models.Index(
+                fields=['author'],
+                name='post_pending_fanout_idx',
+                condition=models.Q(fanned_out=False),
+            ),
+            models.Index(fields=['image'], name='post_image_idx'),
+            models.Index(
+                fields=['image_hash'], name='post_image_hash_idx'
+            ),
+        ]
         verbose_name = 'Post'
         verbose_name_plural = 'Posts'
         ordering = ('-created',)
@@ -65,6 +143,11 @@ class Comment(CreatedModel):
     text = models.TextField('Текст', help_text='Текст нового комментария')
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created'], name='comment_post_created_idx'
+            ),
+        ]
         verbose_name = 'Comment'
         verbose_name_plural = 'Comments'
         pass
@@ -97,3 +180,147 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following',
     )
+
+
+class TimelineEntry(models.Model):
+    """Запись ленты подписок.
+
+    Заполняется при публикации поста (fan-out on write), чтобы
+    follow_index читал ленту одним проходом по индексу.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    created = models.DateTimeField('Дата создания поста')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-created', '-post'],
+                name='timeline_user_created_idx',
+            ),
+        ]
+        ordering = ('-created', '-post')
+        verbose_name = 'Timeline entry'
+        verbose_name_plural = 'Timeline entries'
+
+
+class Tag(models.Model):
+    """Хештег #name или упоминание @name из текстов постов."""
+    HASHTAG = '#'
+    MENTION = '@'
+    KINDS = (
+        (HASHTAG, 'Хештег'),
+        (MENTION, 'Упоминание'),
+    )
+
+    kind = models.CharField('Вид', max_length=1, choices=KINDS)
+    name = models.CharField('Имя', max_length=150)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'name'], name='unique_tag'
+            ),
+        ]
+        verbose_name = 'Tag'
+        verbose_name_plural = 'Tags'
+
+    def __str__(self) -> str:
+        return f'{self.kind}{self.name}'
+
+
+class PostTag(models.Model):
+    """Связь тега с постом.
+
+    Дата поста продублирована, чтобы лента тега листалась
+    курсором по индексу (tag, created, post).
+    """
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+    )
+    created = models.DateTimeField('Дата создания поста')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tag', 'post'], name='unique_post_tag'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['tag', '-created', '-post'],
+                name='post_tag_created_idx',
+            ),
+        ]
+        ordering = ('-created', '-post')
+        verbose_name = 'Post tag'
+        verbose_name_plural = 'Post tags'
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя.
+
+    Обновляются F-выражениями при создании и удалении постов
+    и подписок, чтобы страницы не считали их агрегатами.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    popular = models.BooleanField(
+        'Популярный',
+        default=False,
+        help_text='Посты читаются в ленты подписок при открытии',
+    )
+
+    class Meta:
+        verbose_name = 'User stats'
+        verbose_name_plural = 'User stats'
+
+    def __str__(self) -> str:
+        return str(self.user)
+
+
+class PostImport(models.Model):
+    """Сколько строк файла уже загрузила команда import_posts.
+
+    Обновляется в той же транзакции, что и пачка постов,
+    поэтому после сбоя импорт продолжается ровно с первой
+    незаписанной строки.
+    """
+    source = models.CharField('Файл', max_length=255, unique=True)
+    rows = models.PositiveIntegerField('Прочитано строк', default=0)
+    imported = models.PositiveIntegerField('Загружено постов', default=0)
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Post import'
+        verbose_name_plural = 'Post imports'
+
+    def __str__(self) -> str:
+        return self.source
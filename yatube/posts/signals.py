@@ -0,0 +1,196 @@
+from core.page_cache import purge
+from core.storage import blob_deleted
+from core.tasks import defer
+from core.thumbnails import thumbnail_ready
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import counters, tasks, timeline
+from .images import acquire_image, drop_derived, release_image
+from .caching import bump_feed_version, post_keys, purge_post
+from .models import Comment, Follow, Group, Post, PostTag, User, UserStats
+
+
+@receiver(post_save, sender=Post)
+def post_fan_out(sender, instance, created, **kwargs):
+    if created:
+        defer(tasks.fan_out, instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+@receiver(post_delete, sender=User)
+def feed_changed(sender, **kwargs):
+    bump_feed_version()
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    bump_feed_version()
+    purge('feed', f'author:{instance.pk}')
+
+
+@receiver(post_delete, sender=User)
+def author_deleted(sender, instance, **kwargs):
+    purge('feed', f'author:{instance.pk}')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_pages_changed(sender, instance, **kwargs):
+    purge_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_tagged(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'text' in update_fields:
+        defer(tasks.index_tags, instance.pk)
+
+
+@receiver(pre_delete, sender=Post)
+def post_untagged(sender, instance, **kwargs):
+    touched = PostTag.objects.filter(post=instance).values_list(
+        'tag_id', flat=True
+    )
+    purge(*(f'tag:{pk}' for pk in touched))
+
+
+@receiver(thumbnail_ready)
+def thumbnail_pages_changed(sender, name, **kwargs):
+    """Страницы с постами этой картинки показывали заглушку.
+
+    Главная и её фрагменты не сбрасываются: ради каждой миниатюры
+    пришлось бы заново строить все ленты, а заглушка на главной
+    сменится картинкой при следующей правке ленты.
+    """
+    posts = Post.objects.filter(image=name).only('author', 'group')
+    keys = {key for post in posts for key in post_keys(post)}
+    if keys:
+        purge(*keys)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_pages_changed(sender, instance, **kwargs):
+    purge(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_pages_changed(sender, instance, **kwargs):
+    purge('feed', f'group:{instance.pk}')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_pages_changed(sender, instance, **kwargs):
+    purge(f'author:{instance.author_id}', f'timeline:{instance.user_id}')
+
+
+@receiver(post_save, sender=User)
+def create_stats(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_user(instance.author_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_comments(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    counters.bump_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_user(instance.author_id, 'followers_count', 1)
+        counters.bump_user(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, 'followers_count', -1)
+    counters.bump_user(instance.user_id, 'following_count', -1)
+
+
+def settle_popularity(author_id):
+    # Переход порога перекладывает ленты всех подписчиков автора,
+    # поэтому идёт задачей очереди, а не в запросе подписки
+    if timeline.popularity_changed(author_id):
+        defer(
+            tasks.settle_popularity, author_id,
+            key=f'popularity:{author_id}',
+        )
+
+
+# После счётчиков: порог популярности читается из followers_count
+@receiver(post_save, sender=Follow)
+def follow_backfill(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+        settle_popularity(instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def unfollow_purge(sender, instance, **kwargs):
+    timeline.purge(instance.user_id, instance.author_id)
+    settle_popularity(instance.author_id)
+
+
+@receiver(pre_save, sender=Post)
+def remember_image(sender, instance, update_fields=None, **kwargs):
+    instance._previous_image = ''
+    if instance._state.adding:
+        return
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    instance._previous_image = Post.objects.filter(
+        pk=instance.pk
+    ).values_list('image', flat=True).first() or ''
+
+
+@receiver(post_save, sender=Post)
+def count_image(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    previous = getattr(instance, '_previous_image', '')
+    current = instance.image.name or ''
+    if previous == current:
+        return
+    if current:
+        acquire_image(current)
+    if previous:
+        release_image(previous)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_image(sender, instance, **kwargs):
+    if instance.image:
+        release_image(instance.image.name)
+
+
+@receiver(blob_deleted)
+def image_deleted(sender, name, **kwargs):
+    drop_derived(name)
@@ -0,0 +1,133 @@
+import re
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Post, PostTag, Tag, feed_fields
+
+HASHTAG = re.compile(r'(?<![\w#])#(\w+)')
+MENTION = re.compile(r'(?<![\w@])@([\w.+-]+)')
+MAX_NAME_LENGTH = 150
+BATCH_SIZE = 500
+
+
+def extract(text):
+    """Множество пар (вид, имя) хештегов и упоминаний текста.
+
+    Хештеги приводятся к нижнему регистру, упоминания
+    сохраняются как есть — это имена пользователей.
+    """
+    found = {
+        (Tag.HASHTAG, name.lower()[:MAX_NAME_LENGTH])
+        for name in HASHTAG.findall(text)
+    }
+    for name in MENTION.findall(text):
+        # Точка в конце — конец предложения, а не часть имени
+        name = name.rstrip('.')[:MAX_NAME_LENGTH]
+        if name:
+            found.add((Tag.MENTION, name))
+    return found
+
+
+def parse_name(name):
+    """Вид и имя тега из адреса: @name — упоминание, иначе хештег."""
+    if name.startswith(Tag.MENTION):
+        return Tag.MENTION, name[1:MAX_NAME_LENGTH + 1]
+    return Tag.HASHTAG, name.lower()[:MAX_NAME_LENGTH]
+
+
+def _tag_ids(pairs):
+    """id тегов, недостающие теги создаются."""
+    if not pairs:
+        return {}
+    Tag.objects.bulk_create(
+        (Tag(kind=kind, name=name) for kind, name in pairs),
+        ignore_conflicts=True,
+    )
+    condition = Q()
+    for kind in {kind for kind, _ in pairs}:
+        condition |= Q(
+            kind=kind, name__in=[name for k, name in pairs if k == kind]
+        )
+    found = Tag.objects.filter(condition).values_list('kind', 'name', 'id')
+    return {(kind, name): pk for kind, name, pk in found}
+
+
+def index_post(post):
+    """Обновляет теги поста по разнице старых и новых.
+
+    Возвращает id всех тегов, которых коснулась правка:
+    их ленты нужно сбросить из кэша.
+    """
+    new = extract(post.text)
+    old = {
+        (kind, name): pk
+        for kind, name, pk in PostTag.objects.filter(post=post).values_list(
+            'tag__kind', 'tag__name', 'tag_id'
+        )
+    }
+    removed = [old[pair] for pair in old.keys() - new]
+    with transaction.atomic():
+        if removed:
+            PostTag.objects.filter(post=post, tag_id__in=removed).delete()
+        added = _tag_ids(new - old.keys())
+        PostTag.objects.bulk_create(
+            PostTag(tag_id=pk, post=post, created=post.created)
+            for pk in added.values()
+        )
+    return set(old.values()) | set(added.values())
+
+
+def index_new(posts):
+    """Раскладывает теги пачки только что созданных постов.
+
+    В отличие от index_post не читает старые теги: их нет.
+    Возвращает id тегов, которых коснулась пачка.
+    """
+    found = {post.pk: extract(post.text) for post in posts}
+    ids = _tag_ids(set().union(*found.values()))
+    PostTag.objects.bulk_create(
+        (
+            PostTag(tag_id=ids[pair], post_id=post.pk, created=post.created)
+            for post in posts
+            for pair in found[post.pk]
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return set(ids.values())
+
+
+def rebuild():
+    """Заново раскладывает теги всех постов, возвращает число связей.
+
+    Теги, которые больше не встречаются ни в одном посте, удаляются.
+    """
+    PostTag.objects.all().delete()
+    linked = 0
+    batch = []
+    posts = Post.objects.values_list('id', 'text', 'created')
+    for post_id, text, created in posts.iterator():
+        ids = _tag_ids(extract(text))
+        batch += [
+            PostTag(tag_id=pk, post_id=post_id, created=created)
+            for pk in ids.values()
+        ]
+        if len(batch) >= BATCH_SIZE:
+            PostTag.objects.bulk_create(batch)
+            linked += len(batch)
+            batch = []
+    PostTag.objects.bulk_create(batch)
+    Tag.objects.filter(post_tags__isnull=True).delete()
+    return linked + len(batch)
+
+
+def tag_feed(tag):
+    """Лента тега: аргументы для paginate по записям PostTag."""
+    entries = tag.post_tags.select_related(
+        'post__author', 'post__group'
+    ).only('tag', 'created', 'post', *feed_fields('post__'))
+    return entries, {
+        'keys': ('created', 'post_id'),
+        'unwrap': 'post',
+        'fallback': Post.objects.for_feed().filter(post_tags__tag=tag),
+    }
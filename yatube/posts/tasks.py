@@ -0,0 +1,36 @@
+"""Работа после записи поста, которую выполняет runworker.
+
+Сигналы ставят задачи в очередь после фиксации (core.tasks.defer),
+и страница отвечает, не дожидаясь их. Задача может выполниться
+повторно, поэтому каждая пересчитывает результат по текущему
+состоянию поста, а не сдвигает его. Ключей у задач нет: задача
+держит ключ, пока выполняется, и правка, пришедшая в это время,
+не попала бы в очередь.
+"""
+from core.page_cache import purge
+
+from . import tags, timeline
+from .models import Post
+
+
+def fan_out(post_id):
+    """Раскладывает пост по лентам подписчиков автора."""
+    post = Post.objects.filter(pk=post_id).only('author', 'created').first()
+    if post is None:
+        return
+    timeline.fan_out(post)
+    Post.objects.filter(pk=post_id).update(fanned_out=True)
+
+
+def index_tags(post_id):
+    """Обновляет теги поста и сбрасывает ленты этих тегов."""
+    post = Post.objects.filter(pk=post_id).only('text', 'created').first()
+    if post is None:
+        return
+    touched = tags.index_post(post)
+    purge(*(f'tag:{pk}' for pk in touched))
+
+
+def settle_popularity(author_id):
+    """Перекладывает ленты подписчиков автора, перешедшего порог."""
+    timeline.settle(author_id)
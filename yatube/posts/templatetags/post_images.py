@@ -0,0 +1,28 @@
+from core import variants
+from django import template
+from django.conf import settings
+
+register = template.Library()
+
+# Картинка занимает всю ширину колонки, но не больше 960px
+SIZES = '(max-width: 960px) 100vw, 960px'
+
+
+@register.inclusion_tag('includes/picture.html')
+def post_picture(post):
+    """Картинка поста с srcset, пока вариантов нет — миниатюра.
+
+    Размеры и размытая заглушка берутся из полей поста и настроек,
+    файл картинки при этом не открывается.
+    """
+    width, height = variants.variant_size(
+        max(settings.IMAGE_VARIANT_WIDTHS)
+    )
+    context = {'post': post, 'width': width, 'height': height}
+    if post.image and post.image_hash:
+        context.update({
+            'sources': variants.sources(post.image_hash),
+            'fallback': variants.fallback_url(post.image_hash),
+            'sizes': SIZES,
+        })
+    return context
@@ -0,0 +1,41 @@
+import re
+
+from django import template
+from django.urls import reverse
+from django.utils.html import escape, format_html
+from django.utils.safestring import mark_safe
+
+from ..models import Tag
+from ..tags import HASHTAG, MENTION
+
+register = template.Library()
+
+TAGGED = re.compile(f'{HASHTAG.pattern}|{MENTION.pattern}')
+
+
+def _link(match):
+    hashtag, mention = match.groups()
+    if hashtag:
+        label, tail = match.group(), ''
+        url = reverse('posts:tag_posts', args=[hashtag.lower()])
+    else:
+        # Точка в конце упоминания — конец предложения
+        name = mention.rstrip('.')
+        if not name:
+            return escape(match.group())
+        label, tail = Tag.MENTION + name, mention[len(name):]
+        url = reverse('posts:tag_posts', args=[label])
+    return format_html('<a href="{}">{}</a>{}', url, label, tail)
+
+
+@register.filter
+def tagged(text):
+    """Экранирует текст поста, хештеги и упоминания делает ссылками."""
+    parts = []
+    position = 0
+    for match in TAGGED.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        parts.append(_link(match))
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return mark_safe(''.join(parts))
@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Group, Post, User
+
+from yatube.settings import PICTURE
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoBody')
+        other = User.objects.create_user(username='Other')
+        group = Group.objects.create(
+            title='Title', slug='test-slug', description='description'
+        )
+        for i in range(2):
+            cls.post = Post.objects.create(
+                author=cls.user,
+                text=f'Пост {i}',
+                group=group,
+                image=SimpleUploadedFile(
+                    name='small.gif', content=PICTURE,
+                    content_type='image/gif',
+                ),
+            )
+        Post.objects.create(author=other, text='Чужой пост')
+        Comment.objects.create(post=cls.post, author=cls.user, text='Мой')
+        Comment.objects.create(post=cls.post, author=other, text='Чужой')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def get(self, **params):
+        response = self.client.get(reverse('posts:export'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_jsonl(self):
+        records = [
+            json.loads(line) for line in self.get().decode().splitlines()
+        ]
+        self.assertEqual(
+            [(record['type'], record['text']) for record in records],
+            [('post', 'Пост 0'), ('post', 'Пост 1'), ('comment', 'Мой')],
+        )
+        self.assertEqual(records[0]['group'], 'test-slug')
+        self.assertEqual(records[2]['post'], self.post.pk)
+
+    def test_csv(self):
+        rows = list(csv.DictReader(io.StringIO(
+            self.get(format='csv').decode()
+        )))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1]['image'], self.post.image.name)
+
+    def test_zip_with_shared_image_once(self):
+        archive = zipfile.ZipFile(io.BytesIO(self.get(images=1)))
+        self.assertEqual(
+            archive.namelist(),
+            ['NoBody.jsonl', f'images/{self.post.image.name}'],
+        )
+        self.assertEqual(
+            archive.read(f'images/{self.post.image.name}'), PICTURE
+        )
+        for info in archive.infolist():
+            self.assertGreaterEqual(
+                info.extract_version, zipfile.ZIP64_VERSION
+            )
+
+    def test_guest_redirected(self):
+        response = Client().get(reverse('posts:export'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_command(self):
+        path = os.path.join(TEMP_MEDIA_ROOT, 'export.csv')
+        call_command(
+            'export_user', 'NoBody', format='csv', output=path,
+            stdout=StringIO(),
+        )
+        with open(path, encoding='utf-8') as file_:
+            self.assertEqual(len(list(csv.DictReader(file_))), 3)
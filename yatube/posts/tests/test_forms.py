@@ -1,10 +1,15 @@
+import hashlib
 import shutil
 import tempfile
 
+from core.page_cache import _tag_key
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models.signals import pre_save
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from posts import counters
 from posts.models import Comment, Group, Post, User
 
 from yatube.settings import PICTURE
@@ -53,6 +58,7 @@ class PostCreateFormTests(TestCase):
     def test_creste_post(self):
         """Валидная форма создания поста."""
         small_gif = PICTURE
+        digest = hashlib.sha256(small_gif).hexdigest()
         uploaded = SimpleUploadedFile(
             name='small.gif',
             content=small_gif,
@@ -79,7 +85,7 @@ class PostCreateFormTests(TestCase):
             Post.objects.filter(
                 text='Текст поста для теста',
                 group=self.group.pk,
-                image=''
+                image=f'posts/{digest[:2]}/{digest}.gif'
             ).exists())
 
     def test_post_edit(self):
@@ -97,6 +103,37 @@ class PostCreateFormTests(TestCase):
         )
         self.assertEqual(self.post.text, 'Изменённый текст')
 
+    def test_post_edit_keeps_counters(self):
+        """Комментарий, учтённый во время правки, не теряется."""
+        def concurrent_comment(sender, instance, **kwargs):
+            counters.bump_comments(instance.pk, 1)
+
+        before = Post.objects.get(pk=self.post.pk).comments_count
+        pre_save.connect(concurrent_comment, sender=Post)
+        try:
+            self.authorized_client.post(
+                reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+                data={'text': 'Правка'},
+            )
+        finally:
+            pre_save.disconnect(concurrent_comment, sender=Post)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, 'Правка')
+        self.assertEqual(self.post.comments_count, before + 1)
+
+    def test_post_edit_purges_old_group(self):
+        """Старая группа сбрасывается только после сохранения."""
+        key = _tag_key(f'group:{self.group.pk}')
+        cache.set(key, 1, None)
+        url = reverse('posts:post_edit', kwargs={'post_id': self.post.id})
+        response = self.authorized_client.post(
+            url, data={'text': '', 'group': self.group.pk}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(cache.get(key), 1)
+        self.authorized_client.post(url, data={'text': 'Без группы'})
+        self.assertNotEqual(cache.get(key), 1)
+
     def test_add_comment(self):
         comment_count = Comment.objects.count()
         form_data = {
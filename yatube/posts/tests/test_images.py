@@ -0,0 +1,123 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from core import variants
+from core.models import Task
+from core.tests.utils import run_on_commit
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post, User
+
+from yatube.settings import PICTURE
+
+from ..images import build_variants
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def picture(name='small.gif'):
+    return SimpleUploadedFile(
+        name=name, content=PICTURE, content_type='image/gif'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageVariantsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoBody')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_variants_shared_by_content(self):
+        """Одинаковые картинки разных постов делят варианты."""
+        first = Post.objects.create(
+            author=self.user, text='Первый', image=picture()
+        )
+        second = Post.objects.create(
+            author=self.user, text='Второй', image=picture()
+        )
+        self.assertEqual(first.image.name, second.image.name)
+        build_variants(first.pk, first.image.name)
+        with mock.patch.object(variants, 'ImageOps') as image_ops:
+            build_variants(second.pk, second.image.name)
+        image_ops.fit.assert_not_called()
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.image_hash, second.image_hash)
+        for width in settings.IMAGE_VARIANT_WIDTHS:
+            self.assertTrue(default_storage.exists(
+                variants.variant_name(first.image_hash, width, 'jpeg')
+            ))
+
+    def test_feed_renders_srcset(self):
+        post = Post.objects.create(
+            author=self.user, text='Текст', image=picture()
+        )
+        call_command('build_image_variants', stdout=StringIO())
+        response = self.client.get(reverse('posts:index'))
+        post.refresh_from_db()
+        self.assertContains(response, '<picture>')
+        self.assertContains(
+            response,
+            variants.srcset(post.image_hash, 'jpeg'),
+        )
+        self.assertContains(
+            response, 'sizes="(max-width: 960px) 100vw, 960px"'
+        )
+
+    def test_new_image_resets_variants(self):
+        """Новая картинка сбрасывает хеш и ставит варианты в очередь."""
+        post = Post.objects.create(
+            author=self.user, text='Текст', image=picture()
+        )
+        build_variants(post.pk, post.image.name)
+        with run_on_commit():
+            self.client.post(
+                reverse('posts:post_edit', args=[post.pk]),
+                {'text': 'Текст', 'image': picture('other.gif')},
+            )
+        post.refresh_from_db()
+        self.assertEqual(post.image_hash, '')
+        task = Task.objects.get(key=f'variants:{post.pk}:{post.image.name}')
+        self.assertEqual(task.func, 'posts.images.build_variants')
+
+    def test_form_stores_dimensions_and_placeholder(self):
+        """Размеры и заглушка считаются при сохранении формы."""
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'С картинкой', 'image': picture()},
+        )
+        post = Post.objects.get(text='С картинкой')
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/jpeg;base64,')
+        )
+        with mock.patch('PIL.Image.open') as image_open:
+            response = self.client.get(reverse('posts:index'))
+        image_open.assert_not_called()
+        self.assertContains(response, 'width="960" height="339"')
+        self.assertContains(response, post.image_placeholder)
+        self.client.post(
+            reverse('posts:post_edit', args=[post.pk]),
+            {'text': 'Без картинки', 'image-clear': 'on'},
+        )
+        post.refresh_from_db()
+        self.assertIsNone(post.image_width)
+        self.assertEqual(post.image_placeholder, '')
@@ -0,0 +1,150 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from posts.models import (Follow, Group, Post, PostImport, PostTag,
+                          TimelineEntry, User)
+from search.engine import search
+from search.models import Term
+from search.stemmer import stem
+
+from ..importer import Importer
+
+
+class ImportPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Title', slug='test-slug', description='description'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.tmp = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp, name)
+        with open(path, 'w', encoding='utf-8') as file_:
+            file_.write(content)
+        return path
+
+    def jsonl(self, rows):
+        return self.write(
+            'posts.jsonl', ''.join(json.dumps(row) + '\n' for row in rows)
+        )
+
+    def test_import_jsonl(self):
+        """Посты создаются со всем, что делают сигналы при save."""
+        path = self.jsonl([
+            {'author': 'Author', 'text': 'Первый #импорт',
+             'group': 'test-slug', 'created': '2020-01-02T03:04:05Z'},
+            {'author': 'Author', 'text': 'Второй'},
+            {'author': 'Nobody', 'text': 'Чужой'},
+            {'author': 'Author', 'text': ''},
+        ])
+        out = StringIO()
+        call_command('import_posts', path, batch_size=2, stdout=out)
+        posts = Post.objects.order_by('pk')
+        self.assertEqual(
+            list(posts.values_list('text', 'group')),
+            [('Первый #импорт', self.group.pk), ('Второй', None)],
+        )
+        self.assertEqual(
+            posts[0].created,
+            datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        )
+        self.assertTrue(PostTag.objects.filter(
+            post=posts[0], tag__name='импорт'
+        ).exists())
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list('user', 'post')),
+            {(self.reader.pk, post.pk) for post in posts},
+        )
+        self.author.stats.refresh_from_db()
+        self.assertEqual(self.author.stats.posts_count, 2)
+        self.assertIn('Пропущено (нет автора): 1', out.getvalue())
+        self.assertIn('Пропущено (нет текста): 1', out.getvalue())
+
+    def test_bad_rows_skipped(self):
+        """Поля неверного типа и невозможные даты не прерывают импорт."""
+        path = self.jsonl([
+            {'author': 'Author', 'text': 'Дата',
+             'created': '2021-13-45T10:00:00'},
+            {'author': 'Author', 'text': 5},
+            {'author': ['Author'], 'text': 'Список'},
+            {'author': {'name': 'Author'}, 'text': 'Словарь'},
+            {'author': 'Author', 'text': 'Группа', 'group': 1},
+            {'author': 'Author', 'text': 'Дата числом', 'created': 1},
+            {'author': 'Author', 'text': 'Целый'},
+        ])
+        out = StringIO()
+        call_command('import_posts', path, stdout=out)
+        self.assertEqual(Post.objects.get().text, 'Целый')
+        self.assertIn('Пропущено (неверная дата): 1', out.getvalue())
+        self.assertIn('Пропущено (неверное поле text): 1', out.getvalue())
+        self.assertIn('Пропущено (неверное поле author): 2', out.getvalue())
+        self.assertIn('Пропущено (неверное поле group): 1', out.getvalue())
+        self.assertIn('Пропущено (неверное поле created): 1', out.getvalue())
+
+    @override_settings(SEARCH_BACKEND='search.engine')
+    def test_import_indexed_for_search(self):
+        """С поисковым движком в настройках импорт ведёт его индекс."""
+        path = self.jsonl([
+            {'author': 'Author', 'text': 'Кот и коты'},
+            {'author': 'Author', 'text': 'Собака и кот'},
+            {'author': 'Author', 'text': 'Погода'},
+        ])
+        call_command('import_posts', path, batch_size=2, stdout=StringIO())
+        self.assertEqual(
+            set(search('кот').values_list('text', flat=True)),
+            {'Кот и коты', 'Собака и кот'},
+        )
+        self.assertEqual(Term.objects.get(term=stem('кот')).documents, 2)
+
+    def test_import_csv(self):
+        path = self.write(
+            'posts.csv',
+            'author,text,group\nAuthor,"Текст, с запятой",test-slug\n',
+        )
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(Post.objects.get().text, 'Текст, с запятой')
+
+    def test_resume_after_crash(self):
+        """После сбоя импорт продолжается с первой незаписанной пачки."""
+        path = self.jsonl(
+            {'author': 'Author', 'text': f'Пост {i}'} for i in range(5)
+        )
+        insert = Importer.insert
+        calls = []
+
+        def crash_second(importer, posts):
+            calls.append(posts)
+            if len(calls) == 2:
+                raise RuntimeError('crash')
+            insert(importer, posts)
+
+        with mock.patch.object(Importer, 'insert', crash_second):
+            with self.assertRaises(RuntimeError):
+                call_command(
+                    'import_posts', path, batch_size=2, stdout=StringIO()
+                )
+        self.assertEqual(PostImport.objects.get().rows, 2)
+        call_command('import_posts', path, batch_size=2, stdout=StringIO())
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('text', flat=True)),
+            [f'Пост {i}' for i in range(5)],
+        )
+        state = PostImport.objects.get()
+        self.assertEqual((state.rows, state.imported), (5, 5))
@@ -1,7 +1,10 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.db import IntegrityError
 from django.test import TestCase
 
-from ..models import Comment, Follow, Group, Post, User
+from ..models import Comment, Follow, Group, Post, User, UserStats
 
 
 class PostModelTest(TestCase):
@@ -66,3 +69,37 @@ class PostModelTest(TestCase):
                     author=self.author,
                 )
         self.assertTrue('UNIQUE constraint failed' in str(context.exception))
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Nobody')
+        cls.author = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(author=cls.author, text='Текст')
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются при создании и удалении записей."""
+        Comment.objects.create(post=self.post, author=self.user, text='К')
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        stats = UserStats.objects.get(user=self.author)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.user).following_count, 1
+        )
+        follow.delete()
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).followers_count, 0
+        )
+
+    def test_reconcile_counters(self):
+        """Команда reconcile_counters чинит разошедшиеся счётчики."""
+        UserStats.objects.filter(user=self.author).update(posts_count=7)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 1
+        )
@@ -0,0 +1,107 @@
+import shutil
+import tempfile
+
+from core.tasks import run_pending
+from core.tests.utils import run_on_commit
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+
+from yatube.settings import PAGE_CONST, PICTURE
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+# Сессия и пользователь — два запроса на любой странице,
+# записи миниатюр всех картинок страницы — ещё один.
+QUERY_BUDGET = {
+    'index': 4,
+    'group_list': 6,
+    'profile': 7,
+    'tag_posts': 6,
+    'follow_index': 5,
+    'post_detail': 6,
+}
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class QueryBudgetTests(TestCase):
+    """Число запросов страницы не зависит от числа постов на ней."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoBody')
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Title',
+            slug='test-slug',
+            description='test description',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def add_posts(self, count):
+        """Посты, которые очередь уже разложила по лентам."""
+        with run_on_commit():
+            for i in range(count):
+                post = self.add_post(i)
+        run_pending()
+        return post
+
+    def add_post(self, i):
+        post = Post.objects.create(
+            author=self.author,
+            text=f'Test text {i} #test @NoBody',
+            group=self.group,
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=PICTURE,
+                content_type='image/gif',
+            ),
+        )
+        Comment.objects.create(post=post, author=self.user, text='C')
+        return post
+
+    def urls(self, post):
+        return {
+            'index': reverse('posts:index'),
+            'group_list': reverse(
+                'posts:group_list', kwargs={'slug': 'test-slug'}
+            ),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': 'Author'}
+            ),
+            'tag_posts': reverse(
+                'posts:tag_posts', kwargs={'name': 'test'}
+            ),
+            'follow_index': reverse('posts:follow_index'),
+            'post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': post.pk}
+            ),
+        }
+
+    def test_query_budget(self):
+        for count in (1, PAGE_CONST):
+            post = self.add_posts(count)
+            for name, url in self.urls(post).items():
+                cache.clear()
+                with self.subTest(name=name, posts=count):
+                    with CaptureQueriesContext(connection) as queries:
+                        self.authorized_client.get(url)
+                    self.assertLessEqual(
+                        len(queries), QUERY_BUDGET[name],
+                        '\n'.join(q['sql'] for q in queries.captured_queries)
+                    )
@@ -0,0 +1,117 @@
+import re
+
+from core.tasks import run_pending
+from core.tests.utils import run_on_commit
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User, UserStats
+
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\w+( AS \w+)?$')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+class QueryPlanTests(TestCase):
+    """Запросы страниц не должны читать таблицы целиком и сортировать
+    результат во временном B-дереве."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoBody')
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Title',
+            slug='test-slug',
+            description='test description',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        with run_on_commit():
+            for i in range(15):
+                cls.post = Post.objects.create(
+                    author=cls.author,
+                    text=f'Test text {i} #test',
+                    group=cls.group,
+                )
+        run_pending()
+        Comment.objects.create(
+            post=cls.post,
+            author=cls.user,
+            text='Test comment',
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assert_indexed(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+        for query in queries.captured_queries:
+            if query['sql'].startswith('SELECT'):
+                self.assert_sql_indexed(query['sql'])
+        return response
+
+    def assert_sql_indexed(self, sql):
+        for step in self.explain(sql):
+            with self.subTest(sql=sql, step=step):
+                self.assertNotRegex(step, FULL_SCAN)
+                self.assertNotIn(TEMP_SORT, step)
+
+    def assert_feed_indexed(self, url):
+        """Проверяет первую и следующую страницу ленты."""
+        response = self.assert_indexed(url)
+        cursor = response.context['page_obj'].paginator.next_cursor
+        self.assertIsNotNone(cursor)
+        self.assert_indexed(f'{url}?after={cursor}')
+        self.assert_indexed(f'{url}?before={cursor}')
+
+    def test_index_plan(self):
+        self.assert_feed_indexed(reverse('posts:index'))
+
+    def test_group_posts_plan(self):
+        self.assert_feed_indexed(
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        )
+
+    def test_profile_plan(self):
+        self.assert_feed_indexed(
+            reverse('posts:profile', kwargs={'username': 'Author'})
+        )
+
+    def test_tag_posts_plan(self):
+        self.assert_feed_indexed(
+            reverse('posts:tag_posts', kwargs={'name': 'test'})
+        )
+
+    def test_follow_index_plan(self):
+        self.assert_feed_indexed(reverse('posts:follow_index'))
+
+    def test_follow_index_popular_plan(self):
+        UserStats.objects.filter(user=self.author).update(popular=True)
+        self.assert_feed_indexed(reverse('posts:follow_index'))
+
+    def test_post_detail_plan(self):
+        self.assert_indexed(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+
+    def test_image_hash_lookup_plan(self):
+        """drop_derived ищет посты с тем же хешем картинки."""
+        with CaptureQueriesContext(connection) as queries:
+            Post.objects.filter(image_hash='0' * 64).exists()
+        self.assert_sql_indexed(queries.captured_queries[0]['sql'])
+
+    def test_post_comments_plan(self):
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        response = self.assert_indexed(url)
+        cursor = response.context['comments'].paginator.encode(
+            response.context['comments'][0]
+        )
+        self.assert_indexed(f'{url}?after={cursor}')
@@ -0,0 +1,144 @@
+import hashlib
+import shutil
+import tempfile
+from io import StringIO
+
+from core.models import Blob, Task
+from core.storage import content_storage
+from core.tasks import run_pending
+from core.tests.utils import run_on_commit
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from posts.models import Post, User
+from sorl.thumbnail.images import ImageFile
+
+from yatube.settings import PICTURE
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+DIGEST = hashlib.sha256(PICTURE).hexdigest()
+HASHED_NAME = f'posts/{DIGEST[:2]}/{DIGEST}.gif'
+
+
+def picture(name='small.gif', content=PICTURE):
+    return SimpleUploadedFile(
+        name=name, content=content, content_type='image/gif'
+    )
+
+
+def expire_pins():
+    """Загрузки давно закончились: файлы держат только ссылки."""
+    Blob.objects.update(pinned_until=None)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoBody')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create(self, image):
+        return Post.objects.create(author=self.user, text='Текст', image=image)
+
+    def test_same_content_shares_file(self):
+        first = self.create(picture('first.gif'))
+        second = self.create(picture('second.GIF'))
+        self.assertEqual(first.image.name, HASHED_NAME)
+        self.assertEqual(second.image.name, HASHED_NAME)
+        self.assertEqual(Blob.objects.get(name=HASHED_NAME).refs, 2)
+        self.assertEqual(
+            ImageFile(first.image).key, ImageFile(second.image).key
+        )
+
+    def test_file_deleted_with_last_reference(self):
+        first = self.create(picture())
+        second = self.create(picture())
+        expire_pins()
+        with run_on_commit():
+            first.delete()
+            self.assertTrue(content_storage.exists(HASHED_NAME))
+            second.delete()
+        self.assertFalse(content_storage.exists(HASHED_NAME))
+        self.assertFalse(Blob.objects.exists())
+
+    def test_new_image_releases_old(self):
+        post = self.create(picture())
+        expire_pins()
+        with run_on_commit():
+            self.client.post(
+                reverse('posts:post_edit', args=[post.pk]),
+                {'text': 'Текст', 'image': picture(
+                    'other.gif', PICTURE.replace(b'\x02', b'\x03', 1)
+                )},
+            )
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, HASHED_NAME)
+        self.assertFalse(content_storage.exists(HASHED_NAME))
+        self.assertEqual(
+            list(Blob.objects.values_list('name', 'refs')),
+            [(post.image.name, 1)],
+        )
+
+    def test_upload_pins_released_file(self):
+        post = self.create(picture())
+        expire_pins()
+        # Колбэк удаления файла не вызывается: его зовёт сам тест
+        post.delete()
+        # Загрузка того же файла застала его на диске и не пишет заново
+        name = content_storage.save('posts/small.gif', ContentFile(PICTURE))
+        self.assertFalse(content_storage.collect(name))
+        self.assertTrue(content_storage.exists(name))
+        self.assertTrue(Task.objects.filter(key=f'blob:{name}').exists())
+        self.create(name)
+        expire_pins()
+        Task.objects.update(run_at=timezone.now())
+        run_pending()
+        self.assertTrue(content_storage.exists(name))
+        self.assertEqual(Blob.objects.get(name=name).refs, 1)
+
+    def test_upload_after_delete_rewrites_file(self):
+        post = self.create(picture())
+        expire_pins()
+        # Колбэк удаления файла не вызывается: его зовёт сам тест
+        post.delete()
+        self.assertTrue(content_storage.collect(HASHED_NAME))
+        self.assertFalse(content_storage.exists(HASHED_NAME))
+        name = content_storage.save('posts/small.gif', ContentFile(PICTURE))
+        self.assertEqual(name, HASHED_NAME)
+        self.assertTrue(content_storage.exists(name))
+        self.assertFalse(content_storage.collect(name))
+
+    def test_deduplicate_legacy_images(self):
+        legacy = FileSystemStorage()
+        names = [
+            legacy.save('posts/small.gif', ContentFile(PICTURE))
+            for _ in range(2)
+        ]
+        for name in names:
+            post = self.create(None)
+            Post.objects.filter(pk=post.pk).update(image=name)
+        call_command('deduplicate_images', stdout=StringIO())
+        self.assertEqual(
+            set(Post.objects.values_list('image', flat=True)), {HASHED_NAME}
+        )
+        self.assertEqual(Blob.objects.get(name=HASHED_NAME).refs, 2)
+        for name in names:
+            self.assertFalse(legacy.exists(name))
@@ -0,0 +1,94 @@
+from core.tasks import run_pending
+from core.tests.utils import RunOnCommitMixin
+from django.template import Context, Template
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Post, PostTag, Tag, User
+
+from yatube.settings import PAGE_CONST
+
+from ..tags import extract
+
+
+class TagsTest(RunOnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoBody')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def tags_of(self, post):
+        return {
+            str(link.tag)
+            for link in PostTag.objects.filter(post=post).select_related('tag')
+        }
+
+    def test_extract(self):
+        """Хештеги без учёта регистра, упоминания без точки в конце."""
+        self.assertEqual(
+            extract('#Кот и #кот, пишите @leo.tolstoy. mail@example.com'),
+            {('#', 'кот'), ('@', 'leo.tolstoy')},
+        )
+
+    def test_edit_reindexes_by_diff(self):
+        """Правка через post_edit меняет только изменившиеся теги."""
+        post = Post.objects.create(author=self.user, text='#один #два')
+        run_pending()
+        kept = PostTag.objects.get(post=post, tag__name='один')
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            {'text': '#один #три @NoBody'},
+        )
+        run_pending()
+        self.assertEqual(self.tags_of(post), {'#один', '#три', '@NoBody'})
+        self.assertEqual(PostTag.objects.get(pk=kept.pk).tag.name, 'один')
+        self.assertTrue(Tag.objects.filter(name='два').exists())
+
+    def test_tag_feed_pages(self):
+        """Лента тега листается курсором и не показывает чужие посты."""
+        Post.objects.create(author=self.user, text='Без тегов')
+        for i in range(PAGE_CONST + 2):
+            Post.objects.create(author=self.user, text=f'Пост {i} #лента')
+        run_pending()
+        url = reverse('posts:tag_posts', kwargs={'name': 'Лента'})
+        response = self.authorized_client.get(url)
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), PAGE_CONST)
+        response = self.authorized_client.get(
+            url, {'after': page_obj.paginator.next_cursor}
+        )
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['Пост 1 #лента', 'Пост 0 #лента'],
+        )
+        self.assertEqual(
+            self.authorized_client.get(
+                reverse('posts:tag_posts', kwargs={'name': 'нет'})
+            ).status_code,
+            404,
+        )
+
+    def test_mention_feed(self):
+        post = Post.objects.create(author=self.user, text='Привет, @NoBody!')
+        run_pending()
+        response = self.authorized_client.get(
+            reverse('posts:tag_posts', kwargs={'name': '@NoBody'})
+        )
+        self.assertEqual(list(response.context['page_obj']), [post])
+
+    def test_tagged_filter(self):
+        """Фильтр экранирует текст и делает теги ссылками."""
+        rendered = Template('{% load post_text %}{{ text|tagged }}').render(
+            Context({'text': "<b>' #Кот</b> @NoBody."})
+        )
+        self.assertEqual(
+            rendered,
+            '&lt;b&gt;&#39; <a href="{}">#Кот</a>&lt;/b&gt; '
+            '<a href="{}">@NoBody</a>.'.format(
+                reverse('posts:tag_posts', args=['кот']),
+                reverse('posts:tag_posts', args=['@NoBody']),
+            ),
+        )
@@ -0,0 +1,147 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from core import tasks, thumbnails
+from core.models import Task
+from core.tests.utils import run_on_commit
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.caching import feed_version
+from posts.models import Post, User
+from sorl.thumbnail import default
+
+from yatube.settings import PICTURE
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoBody')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Test text',
+            image=SimpleUploadedFile(
+                name='small.gif', content=PICTURE, content_type='image/gif'
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # Записи KV-хранилища в базе откатываются после каждого теста,
+        # а в кэше остаются
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_cold_image_renders_placeholder(self):
+        """Без готовой миниатюры страница не строит её, а даёт заглушку."""
+        with run_on_commit():
+            response = self.client.get(
+                reverse('posts:post_detail', args=[self.post.pk])
+            )
+        self.assertContains(response, 'src="data:image/svg+xml,')
+        task = Task.objects.get()
+        self.assertEqual(task.func, 'core.thumbnails.generate')
+        name, _, geometry_string, _ = json.loads(task.args)
+        self.assertEqual(name, self.post.image.name)
+        self.assertEqual(geometry_string, '960x339')
+        self.assertEqual(task.priority, settings.THUMBNAIL_TASK_PRIORITY)
+
+    def test_generated_thumbnail_is_served(self):
+        call_command('generate_thumbnails', stdout=StringIO())
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertNotContains(response, 'data:image/svg+xml')
+        self.assertContains(response, settings.MEDIA_URL + 'cache/')
+
+    def test_pages_refreshed_after_worker(self):
+        """Закэшированные с заглушкой страницы поста и его автора
+        сбрасываются, когда обработчик построил миниатюру."""
+        guest = Client()
+        urls = [
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        ]
+        with run_on_commit():
+            for url in urls:
+                for client in (guest, self.client):
+                    self.assertContains(
+                        client.get(url), 'src="data:image/svg+xml,'
+                    )
+            tasks.run_pending()
+        for url in urls:
+            for client in (guest, self.client):
+                response = client.get(url)
+                self.assertNotContains(response, 'data:image/svg+xml')
+                self.assertContains(response, settings.MEDIA_URL + 'cache/')
+
+    def test_worker_keeps_feed(self):
+        """Миниатюра не сбрасывает главную и версию лент."""
+        with run_on_commit():
+            self.client.get(reverse('posts:index'))
+            version = feed_version()
+            with mock.patch('posts.signals.purge') as purge:
+                tasks.run_pending()
+        self.assertEqual(feed_version(), version)
+        self.assertTrue(purge.called)
+        for call in purge.call_args_list:
+            self.assertNotIn('feed', call.args)
+
+    def test_create_schedules_all_geometries(self):
+        """Миниатюры новой картинки строит очередь, а не запрос."""
+        with run_on_commit():
+            self.client.post(reverse('posts:post_create'), {
+                'text': 'С картинкой',
+                'image': SimpleUploadedFile(
+                    name='new.gif',
+                    content=PICTURE,
+                    content_type='image/gif',
+                ),
+            })
+        post = Post.objects.get(text='С картинкой')
+        self.assertEqual(
+            Task.objects.filter(func='core.thumbnails.generate').count(),
+            len(settings.THUMBNAIL_PREGENERATE),
+        )
+        tasks.run_pending()
+        self.assertFalse(Task.objects.exists())
+        thumbnail = default.backend.get_thumbnail(
+            post.image, '960x339', crop='center', upscale=True
+        )
+        self.assertTrue(thumbnail.url.startswith(settings.MEDIA_URL))
+
+    def test_prefetch_reads_store_once(self):
+        """Записи миниатюр страницы читаются одним запросом к базе,
+        а тег потом берёт их из файла картинки."""
+        call_command('generate_thumbnails', stdout=StringIO())
+        cache.clear()
+        posts = list(Post.objects.all())
+        with CaptureQueriesContext(connection) as queries:
+            thumbnails.prefetch_thumbnails(posts)
+            thumbnail = default.backend.get_thumbnail(
+                posts[0].image, '960x339', crop='center', upscale=True
+            )
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(thumbnail.url.startswith(settings.MEDIA_URL))
+        posts = list(Post.objects.all())
+        with CaptureQueriesContext(connection) as queries:
+            thumbnails.prefetch_thumbnails(posts)
+        self.assertEqual(len(queries), 0)
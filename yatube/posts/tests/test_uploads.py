@@ -0,0 +1,114 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+# Теги EXIF «производитель камеры» и «ориентация»
+EXIF_MAKE = 0x010F
+EXIF_ORIENTATION = 0x0112
+
+
+def jpeg(size=(40, 20), exif=None):
+    buffer = BytesIO()
+    options = {} if exif is None else {'exif': exif.tobytes()}
+    Image.new('RGB', size, 'red').save(buffer, 'JPEG', **options)
+    return SimpleUploadedFile(
+        name='photo.jpg', content=buffer.getvalue(), content_type='image/jpeg'
+    )
+
+
+def png(size=(40, 20)):
+    buffer = BytesIO()
+    Image.new('RGBA', size, 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(
+        name='picture.png', content=buffer.getvalue(),
+        content_type='image/png',
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoBody')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create(self, image):
+        return self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'С картинкой', 'image': image},
+        )
+
+    @override_settings(IMAGE_UPLOAD_MAX_BYTES=100)
+    def test_too_many_bytes_rejected(self):
+        response = self.create(jpeg())
+        self.assertFalse(Post.objects.exists())
+        self.assertFormError(
+            response, 'form', 'image',
+            'Файл слишком большой: не больше 100\xa0байт',
+        )
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=500)
+    def test_too_many_pixels_rejected(self):
+        """Размеры берутся из заголовка, файл дальше не читается."""
+        response = self.create(jpeg((40, 20)))
+        self.assertFalse(Post.objects.exists())
+        self.assertFormError(
+            response, 'form', 'image',
+            'Картинка 40×20 слишком большая: не больше 500 пикселей',
+        )
+
+    @override_settings(IMAGE_UPLOAD_MAX_DECODED_PIXELS=500)
+    def test_decoded_formats_limited(self):
+        """PNG декодируется целиком, и его лимит ниже, чем у JPEG."""
+        response = self.create(png((40, 20)))
+        self.assertFalse(Post.objects.exists())
+        self.assertFormError(
+            response, 'form', 'image',
+            'Картинка 40×20 слишком большая: не больше 500 пикселей',
+        )
+        self.create(jpeg((40, 20)))
+        self.assertTrue(Post.objects.exists())
+
+    def test_exif_stripped(self):
+        exif = Image.Exif()
+        exif[EXIF_MAKE] = 'Camera'
+        self.create(jpeg(exif=exif))
+        post = Post.objects.get()
+        with Image.open(post.image.path) as image:
+            self.assertNotIn(EXIF_MAKE, image.getexif())
+            self.assertEqual(image.size, (40, 20))
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIDE=10)
+    def test_long_side_limited(self):
+        self.create(jpeg((40, 20)))
+        post = Post.objects.get()
+        self.assertEqual((post.image_width, post.image_height), (10, 5))
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIDE=10)
+    def test_rotated_after_downscale(self):
+        """Поворот из EXIF применяется к уже уменьшенной картинке."""
+        exif = Image.Exif()
+        exif[EXIF_ORIENTATION] = 6
+        self.create(jpeg((40, 20), exif=exif))
+        post = Post.objects.get()
+        self.assertEqual((post.image_width, post.image_height), (5, 10))
@@ -1,15 +1,21 @@
 import shutil
 import tempfile
+from io import StringIO
 
+from core.models import Task
+from core.tasks import run_pending
+from core.tests.utils import run_on_commit
 from django import forms
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
-from posts.models import Comment, Follow, Group, Post, User
+from posts.models import (Comment, Follow, Group, Post, TimelineEntry,
+                          User, UserStats)
 
-from yatube.settings import PAGE_CONST, PICTURE
+from yatube.settings import COMMENTS_PAGE_CONST, PAGE_CONST, PICTURE
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -190,11 +196,10 @@ class PostPagesTests(TestCase):
 
     def test_cache_index_page_correct_context(self):
         """Кэш index сформирован с правильным контекстом."""
+        cache.clear()
         response = self.authorized_client.get(reverse('posts:index'))
         content = response.content
-        post_id = self.post.id
-        instance = Post.objects.get(pk=post_id)
-        instance.delete()
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
         new_response = self.authorized_client.get(reverse('posts:index'))
         new_content = new_response.content
         self.assertEqual(content, new_content)
@@ -203,6 +208,14 @@ class PostPagesTests(TestCase):
         new_new_content = new_new_response.content
         self.assertNotEqual(content, new_new_content)
 
+    def test_cache_index_invalidated_on_delete(self):
+        """Удаление поста сразу сбрасывает кэш index."""
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Test text')
+        Post.objects.get(pk=self.post.pk).delete()
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Test text')
+
     def test_auth_can_follow(self):
         """Авторизованный пользователь может подписываться на других
         пользователей."""
@@ -247,6 +260,161 @@ class PostPagesTests(TestCase):
         not_follow_context = not_follow_response.context['page_obj']
         self.assertNotEqual(follow_context, not_follow_context)
 
+    def test_follow_timeline_backfill_and_purge(self):
+        """Подписка наполняет ленту постами автора, отписка очищает её."""
+        Post.objects.create(author=self.author, text='Old author post')
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'Author'})
+        )
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            response.context['page_obj'][0].text, 'Old author post'
+        )
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'Author'})
+        )
+        self.assertFalse(self.user.timeline.exists())
+
+    def test_rebuild_timelines_command(self):
+        """Команда rebuild_timelines восстанавливает ленты."""
+        Follow.objects.create(user=self.author, author=self.user)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(
+            list(self.author.timeline.values_list('post', flat=True)),
+            [self.post.pk],
+        )
+
+    @override_settings(FANOUT_FOLLOWERS_LIMIT=0)
+    def test_popular_author_posts_are_pulled(self):
+        """Посты популярного автора не пишутся в ленты,
+        но попадают в ленту подписок при чтении."""
+        with run_on_commit():
+            Follow.objects.create(user=self.user, author=self.author)
+            run_pending()
+            popular = Post.objects.create(author=self.author, text='Popular')
+            run_pending()
+        self.assertTrue(UserStats.objects.get(user=self.author).popular)
+        self.assertFalse(self.user.timeline.exists())
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']), [popular])
+
+    @override_settings(FANOUT_FOLLOWERS_LIMIT=2)
+    def test_popularity_threshold_crossing(self):
+        """Автор, ставший популярным, уходит из лент подписчиков
+        задачей очереди, а обратно раскладывается, только когда
+        подписчиков стало заметно меньше порога."""
+        post = Post.objects.create(author=self.author, text='Crossing')
+        readers = [
+            User.objects.create_user(username=f'Reader{i}') for i in range(2)
+        ]
+        with run_on_commit():
+            Follow.objects.create(user=self.user, author=self.author)
+            follows = [
+                Follow.objects.create(user=reader, author=self.author)
+                for reader in readers
+            ]
+            self.assertTrue(self.user.timeline.filter(post=post).exists())
+            self.assertTrue(Task.objects.filter(
+                key=f'popularity:{self.author.pk}'
+            ).exists())
+            run_pending()
+            self.assertFalse(
+                TimelineEntry.objects.filter(post=post).exists()
+            )
+            response = self.authorized_client.get(
+                reverse('posts:follow_index')
+            )
+            self.assertEqual(list(response.context['page_obj']), [post])
+            # Ниже порога, но выше его доли: автор остаётся популярным
+            follows[0].delete()
+            self.assertFalse(Task.objects.exists())
+            follows[1].delete()
+            run_pending()
+        self.assertFalse(UserStats.objects.get(user=self.author).popular)
+        self.assertTrue(self.user.timeline.filter(post=post).exists())
+
+    @override_settings(FANOUT_BACKFILL_POSTS=2)
+    def test_follow_backfills_recent_posts(self):
+        """Подписка кладёт в ленту только последние посты автора."""
+        posts = [
+            Post.objects.create(author=self.author, text=f'Post {i}')
+            for i in range(3)
+        ]
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(
+            set(self.user.timeline.values_list('post', flat=True)),
+            {posts[1].pk, posts[2].pk},
+        )
+
+    def test_fan_out_queued(self):
+        """Пост раскладывается по лентам в очереди, а пока этого
+        не случилось, лента подписок читает его сама."""
+        Follow.objects.create(user=self.user, author=self.author)
+        with run_on_commit():
+            post = Post.objects.create(author=self.author, text='Queued')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertTrue(
+            Task.objects.filter(func='posts.tasks.fan_out').exists()
+        )
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'][0], post)
+        run_pending()
+        post.refresh_from_db()
+        self.assertTrue(post.fanned_out)
+        self.assertTrue(self.user.timeline.filter(post=post).exists())
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'][0], post)
+
+    def test_guest_page_cache(self):
+        """Гостю повторно отдаётся кэш без запросов к базе,
+        новый комментарий сбрасывает страницу поста."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+        self.assertIn(f'post:{self.post.pk}', response['Surrogate-Key'])
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Fresh comment'
+        )
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'Fresh comment')
+
+    def test_conditional_get(self):
+        """Неизменившаяся страница отдаёт 304 по ETag,
+        новый пост автора меняет ETag профиля."""
+        url = reverse('posts:profile', kwargs={'username': 'NoBody'})
+        etag = self.authorized_client.get(url)['ETag']
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.user, text='Another post')
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_post_detail_comments_paginated(self):
+        """На странице поста первая порция комментариев,
+        остальные отдаёт фрагмент post_comments по курсору."""
+        for i in range(COMMENTS_PAGE_CONST):
+            Comment.objects.create(
+                post=self.post, author=self.author, text=f'Comment {i}'
+            )
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PAGE_CONST)
+        self.assertEqual(comments[0], self.comment)
+        response = self.guest_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+            + f'?after={comments.paginator.next_cursor}'
+        )
+        self.assertTemplateUsed(response, 'includes/comments.html')
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            [f'Comment {COMMENTS_PAGE_CONST - 1}'],
+        )
+
 
 class PaginatorViewsTest(TestCase):
     @classmethod
@@ -309,3 +477,28 @@ class PaginatorViewsTest(TestCase):
             reverse(
                 'posts:profile', kwargs={'username': 'NoBody'}) + '?page=2')
         self.assertEqual(len(response.context['page_obj']), 4)
+
+    def test_index_cursor_pages(self):
+        """Курсоры ?after= и ?before= листают index без номеров страниц."""
+        response = self.guest_client.get(reverse('posts:index'))
+        paginator = response.context['page_obj'].paginator
+        self.assertIsNone(paginator.previous_cursor)
+        response = self.guest_client.get(
+            reverse('posts:index') + f'?after={paginator.next_cursor}')
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 4)
+        self.assertEqual(page_obj[-1].text, 'Test text 0')
+        self.assertIsNone(page_obj.paginator.next_cursor)
+        response = self.guest_client.get(
+            reverse('posts:index')
+            + f'?before={page_obj.paginator.previous_cursor}')
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), PAGE_CONST)
+        self.assertEqual(page_obj[0].text, 'Test text 13')
+        self.assertIsNone(page_obj.paginator.previous_cursor)
+
+    def test_broken_cursor_shows_first_page(self):
+        """Испорченный курсор отдаёт первую страницу."""
+        response = self.guest_client.get(
+            reverse('posts:index') + '?after=broken')
+        self.assertEqual(response.context['page_obj'][0].text, 'Test text 13')
@@ -0,0 +1,191 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Follow, Post, TimelineEntry, UserStats, feed_fields
+
+BATCH_SIZE = 500
+
+
+def _insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def is_popular(author_id):
+    """Посты популярных авторов читаются в ленту при её открытии."""
+    return UserStats.objects.filter(user_id=author_id, popular=True).exists()
+
+
+def popularity_changed(author_id):
+    """Перешёл ли автор порог популярности в какую-либо сторону.
+
+    Популярным автор становится, когда подписчиков больше
+    FANOUT_FOLLOWERS_LIMIT, а перестаёт — только когда их меньше
+    доли FANOUT_DEMOTE_RATIO от порога.
+    """
+    stats = UserStats.objects.filter(user_id=author_id).values_list(
+        'followers_count', 'popular'
+    ).first()
+    if stats is None:
+        return False
+    followers, popular = stats
+    limit = settings.FANOUT_FOLLOWERS_LIMIT
+    if popular:
+        return followers < limit * settings.FANOUT_DEMOTE_RATIO
+    return followers > limit
+
+
+def live_authors(user):
+    """Авторы из подписок, чьи посты лента читает сама.
+
+    Это популярные авторы и авторы постов, которые очередь
+    ещё не разложила по лентам.
+    """
+    pending = Post.objects.filter(fanned_out=False).values('author')
+    return user.follower.filter(
+        Q(author__stats__popular=True) | Q(author__in=pending)
+    ).values_list('author', flat=True)
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if is_popular(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _insert(
+        TimelineEntry(user_id=user_id, post=post, created=post.created)
+        for user_id in followers.iterator()
+    )
+
+
+def fan_out_many(posts):
+    """Раскладывает пачку новых постов по лентам подписчиков.
+
+    Возвращает id подписчиков, чьи ленты изменились.
+    """
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    popular = UserStats.objects.filter(
+        user_id__in=by_author, popular=True
+    ).values_list('user_id', flat=True)
+    follows = Follow.objects.filter(
+        author_id__in=by_author.keys() - set(popular)
+    ).values_list('user_id', 'author_id')
+    users = set()
+    entries = []
+    for user_id, author_id in follows.iterator():
+        users.add(user_id)
+        entries += [
+            TimelineEntry(user_id=user_id, post_id=post.pk,
+                          created=post.created)
+            for post in by_author[author_id]
+        ]
+    _insert(entries)
+    return users
+
+
+def _recent_posts(author_id):
+    return Post.objects.filter(author_id=author_id).order_by(
+        '-created', '-id'
+    ).values_list('id', 'created')[:settings.FANOUT_BACKFILL_POSTS]
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика последние посты автора."""
+    if is_popular(author_id):
+        return
+    _insert(
+        TimelineEntry(user_id=user_id, post_id=post_id, created=created)
+        for post_id, created in _recent_posts(author_id)
+    )
+
+
+def purge(user_id, author_id):
+    """Убирает посты автора из ленты бывшего подписчика."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def promote(author_id):
+    """Делает автора популярным и убирает его посты из всех лент."""
+    UserStats.objects.filter(user_id=author_id).update(popular=True)
+    TimelineEntry.objects.filter(post__author_id=author_id).delete()
+
+
+def demote(author_id):
+    """Раскладывает последние посты автора по лентам подписчиков.
+
+    Флаг снимается после раскладки, пока лента читает посты
+    автора сама; посты, вышедшие за это время, раскладываются
+    после снятия флага.
+    """
+    last = Post.objects.filter(author_id=author_id).order_by(
+        '-pk'
+    ).values_list('pk', flat=True).first() or 0
+    posts = list(_recent_posts(author_id))
+    followers = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    _insert(
+        TimelineEntry(user_id=user_id, post_id=post_id, created=created)
+        for user_id in followers.iterator()
+        for post_id, created in posts
+    )
+    UserStats.objects.filter(user_id=author_id).update(popular=False)
+    fan_out_many(Post.objects.filter(author_id=author_id, pk__gt=last))
+
+
+def settle(author_id):
+    """Переводит автора в популярные или обратно, если он перешёл порог."""
+    if not popularity_changed(author_id):
+        return
+    if is_popular(author_id):
+        demote(author_id)
+    else:
+        promote(author_id)
+
+
+def rebuild():
+    """Пересобирает все ленты с нуля.
+
+    Популярность авторов пересчитывается по порогу без гистерезиса,
+    в ленты попадают последние посты остальных авторов.
+    """
+    TimelineEntry.objects.all().delete()
+    Post.objects.filter(fanned_out=False).update(fanned_out=True)
+    limit = settings.FANOUT_FOLLOWERS_LIMIT
+    UserStats.objects.filter(followers_count__gt=limit).update(popular=True)
+    UserStats.objects.filter(followers_count__lte=limit).update(popular=False)
+    follows = Follow.objects.values_list('user_id', 'author_id')
+    for user_id, author_id in follows.iterator():
+        backfill(user_id, author_id)
+
+
+def follow_feed(user):
+    """Лента подписок: свои записи ленты плюс посты из live_authors.
+
+    Возвращает аргументы для paginate: записи ленты сливаются
+    с постами этих авторов по (created, id).
+    """
+    entries = user.timeline.select_related(
+        'post__author', 'post__group'
+    ).only('user', 'created', 'post', *feed_fields('post__'))
+    extra = [
+        Post.objects.for_feed().filter(author_id=author_id)
+        for author_id in live_authors(user)
+    ]
+    return entries, {
+        'keys': ('created', 'post_id'),
+        'unwrap': 'post',
+        'extra': extra,
+        'fallback': Post.objects.for_feed().filter(
+            author__in=user.follower.values('author')
+        ),
+    }
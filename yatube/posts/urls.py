@@ -6,9 +6,15 @@ app_name = 'posts'
 
 urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('tag/<str:name>/', views.tag_posts, name='tag_posts'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path('create/', views.post_create, name='post_create'),
     path(
         'posts/<int:post_id>/comment/',
@@ -16,6 +22,7 @@ urlpatterns = [
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('export/', views.export_data, name='export'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,39 +1,66 @@
+from core.page_cache import add_surrogate_keys, conditional, purge
+from core.paginator import CursorPaginator, paginate
+from core.thumbnails import prefetch_thumbnails, schedule
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
-from yatube.settings import PAGE_CONST
+from yatube.settings import COMMENTS_PAGE_CONST
 
+from . import caching, export, tags, timeline
+from .caching import feed_version, post_keys
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post, User
+from .images import schedule_variants
+from .models import Comment, Follow, Group, Post, Tag, User
 
 
+@conditional(caching.index_scope)
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, PAGE_CONST)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.for_feed()
+    page_obj = paginate(request, post_list)
+    prefetch_thumbnails(page_obj)
     context = {
         'page_obj': page_obj,
+        'feed_version': feed_version(),
     }
-    return render(request, 'posts/index.html', context)
+    response = render(request, 'posts/index.html', context)
+    return add_surrogate_keys(response, 'feed')
 
 
+@conditional(caching.group_scope)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts_list = Post.objects.filter(group=group)
-    paginator = Paginator(posts_list, PAGE_CONST)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts_list = Post.objects.for_feed().filter(group=group)
+    page_obj = paginate(request, posts_list)
+    prefetch_thumbnails(page_obj)
     context = {
         'group': group,
         'page_obj': page_obj,
     }
-    return render(request, 'posts/group_list.html', context)
+    response = render(request, 'posts/group_list.html', context)
+    return add_surrogate_keys(response, f'group:{group.pk}')
 
 
+@conditional(caching.tag_scope)
+def tag_posts(request, name):
+    kind, name = tags.parse_name(name)
+    tag = get_object_or_404(Tag, kind=kind, name=name)
+    entries, options = tags.tag_feed(tag)
+    page_obj = paginate(request, entries, **options)
+    prefetch_thumbnails(page_obj)
+    context = {
+        'tag': tag,
+        'page_obj': page_obj,
+    }
+    response = render(request, 'posts/tag_list.html', context)
+    return add_surrogate_keys(response, 'feed', f'tag:{tag.pk}')
+
+
+@conditional(caching.profile_scope)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
     if (
         request.user.is_authenticated
         and author != request.user
@@ -44,24 +71,25 @@ def profile(request, username):
         following = None
     else:
         following = False
-    posts_list = Post.objects.filter(author=author)
-    paginator = Paginator(posts_list, PAGE_CONST)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts_list = Post.objects.for_feed().filter(author=author)
+    page_obj = paginate(request, posts_list)
+    prefetch_thumbnails(page_obj)
     context = {
         'page_obj': page_obj,
         'author': author,
-        'posts': posts_list,
         'following': following,
     }
-    return render(request, 'posts/profile.html', context)
+    response = render(request, 'posts/profile.html', context)
+    return add_surrogate_keys(response, f'author:{author.pk}')
 
 
+@conditional(caching.post_scope)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    author = post.author
-    posts_list = Post.objects.filter(author=author)
-    count = posts_list.count()
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), id=post_id
+    )
+    count = post.author.stats.posts_count
+    prefetch_thumbnails([post])
     if request.method == 'POST':
         form = CommentForm(
             request.COMMENT or None
@@ -74,25 +102,53 @@ def post_detail(request, post_id):
             return render(request, 'posts/post_detail.html', {'form': form})
     else:
         form = CommentForm()
-        comment = Comment.objects.filter(post=post)
+        comments = CursorPaginator(
+            post_comments_list(post), COMMENTS_PAGE_CONST, descending=False
+        ).cursor_page()
         context = {
             'post': post,
             'count': count,
             'form': form,
-            'comments': comment,
+            'comments': comments,
         }
-        return render(request, 'posts/post_detail.html', context)
+        response = render(request, 'posts/post_detail.html', context)
+        return add_surrogate_keys(response, *post_keys(post))
+
+
+def post_comments_list(post):
+    return Comment.objects.filter(post=post).select_related(
+        'author'
+    ).order_by('created', 'id')
+
+
+@conditional(caching.post_scope)
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    comments = paginate(
+        request,
+        post_comments_list(post),
+        COMMENTS_PAGE_CONST,
+        descending=False,
+    )
+    context = {
+        'post': post,
+        'comments': comments,
+    }
+    response = render(request, 'includes/comments.html', context)
+    return add_surrogate_keys(response, f'post:{post.pk}')
 
 
 @login_required
 def post_create(request):
     groups = Group.objects.all()
     if request.method == 'POST':
-        form = PostForm(request.POST)
+        form = PostForm(request.POST, files=request.FILES or None)
         if form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
             post.save()
+            schedule(post.image)
+            schedule_variants(post)
             return redirect('posts:profile', post.author.username)
         else:
             return render(request, 'posts/create_post.html', {'form': form})
@@ -112,6 +168,7 @@ def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     groups = Group.objects.all()
     if request.method == 'POST':
+        old_group_id = post.group_id
         form = PostForm(
             request.POST or None,
             files=request.FILES or None,
@@ -120,18 +177,24 @@ def post_edit(request, post_id):
         if form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
-            post.save()
+            # Только поля формы: счётчики, сдвинутые F-выражениями
+            # за время запроса, не затираются прочитанными значениями
+            post.save(update_fields=[*PostForm.saved_fields, 'author'])
+            if old_group_id and old_group_id != post.group_id:
+                purge(f'group:{old_group_id}')
+            schedule(post.image)
+            schedule_variants(post)
             return redirect('posts:post_detail', post.id)
     else:
         form = PostForm(instance=post)
-        is_edit = True
-        context = {
-            'form': form,
-            'groups': groups,
-            'post': post,
-            'is_edit': is_edit,
-        }
-        return render(request, 'posts/create_post.html', context)
+    is_edit = True
+    context = {
+        'form': form,
+        'groups': groups,
+        'post': post,
+        'is_edit': is_edit,
+    }
+    return render(request, 'posts/create_post.html', context)
 
 
 @login_required
@@ -147,15 +210,14 @@ def add_comment(request, post_id):
 
 
 @login_required
+@conditional(caching.follow_scope)
 def follow_index(request):
-    user = request.user
-    authors = user.follower.all().values('author')
-    post_list = Post.objects.filter(author__in=authors)
-    paginator = Paginator(post_list, PAGE_CONST)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    entries, options = timeline.follow_feed(request.user)
+    page_obj = paginate(request, entries, **options)
+    prefetch_thumbnails(page_obj)
     context = {
         'page_obj': page_obj,
+        'feed_version': feed_version(),
     }
     return render(request, 'posts/follow.html', context)
 
@@ -185,3 +247,29 @@ def profile_unfollow(request, username):
     )
     follow.delete()
     return redirect('posts:profile', username=username)
+
+
+@login_required
+def export_data(request):
+    """Выгрузка постов и комментариев пользователя потоком.
+
+    ?format=jsonl|csv, ?images=1 — zip-архив вместе с картинками.
+    """
+    fmt = request.GET.get('format', 'jsonl')
+    if fmt not in export.FORMATS:
+        return HttpResponseBadRequest('format: jsonl или csv')
+    username = request.user.username
+    if request.GET.get('images'):
+        response = StreamingHttpResponse(
+            export.zip_chunks(request.user, fmt),
+            content_type='application/zip',
+        )
+        filename = f'{username}.zip'
+    else:
+        response = StreamingHttpResponse(
+            export.lines(request.user, fmt),
+            content_type=f'{export.FORMATS[fmt]}; charset=utf-8',
+        )
+        filename = f'{username}.{fmt}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,70 @@
+from math import log
+
+from core.paginator import CursorPaginator
+from django.core.cache import cache
+from django.db.models import Case, ExpressionWrapper, F, FloatField, Sum, When
+from posts.models import Post
+
+from .models import Posting, Term
+from .stemmer import terms
+
+DOCUMENTS_KEY = 'search:documents'
+DOCUMENTS_TIMEOUT = 60 * 5
+
+
+def parse(query):
+    """Уникальные термы запроса в порядке появления."""
+    return list(dict.fromkeys(terms(query)))
+
+
+def documents_total():
+    return cache.get_or_set(
+        DOCUMENTS_KEY, Post.objects.count, DOCUMENTS_TIMEOUT
+    )
+
+
+def search(query, queryset=None):
+    """Посты с любым из термов запроса, ранг — сумма tf-idf термов."""
+    if queryset is None:
+        queryset = Post.objects.all()
+    total = documents_total()
+    idf = {
+        term: log(1 + total / documents)
+        for term, documents in Term.objects.filter(
+            term__in=parse(query), documents__gt=0
+        ).values_list('term', 'documents')
+    }
+    if not idf:
+        return queryset.none()
+    rank = Sum(Case(
+        *(
+            When(postings__term=term, then=ExpressionWrapper(
+                F('postings__weight') * weight, output_field=FloatField()
+            ))
+            for term, weight in idf.items()
+        ),
+        output_field=FloatField(),
+    ))
+    return queryset.filter(postings__term__in=idf).annotate(rank=rank)
+
+
+def matching(query):
+    """id постов с любым из термов запроса, для фильтров без ранга."""
+    return Posting.objects.filter(term__in=parse(query)).values('post')
+
+
+class RankPaginator(CursorPaginator):
+    """Курсор по рангу: (rank, id) от самых релевантных постов."""
+    keys = ('rank', 'id')
+
+    @staticmethod
+    def key(obj):
+        return obj.rank, obj.pk
+
+    @staticmethod
+    def dump_value(value):
+        return repr(value)
+
+    @staticmethod
+    def load_value(raw):
+        return float(raw)
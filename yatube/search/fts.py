@@ -0,0 +1,115 @@
+"""Поиск по FTS5-таблицам постов и комментариев с ранжированием bm25."""
+from django.db import connection
+from django.db.models import (ExpressionWrapper, F, FloatField, Func,
+                              OuterRef, Q, Subquery, TextField, Value)
+from django.db.models.functions import Coalesce
+from posts.models import Post
+
+from .models import CommentDocument, Document
+from .stemmer import STOP_WORDS, WORD, stem
+
+# Границы подсветки; текст поста экранируется в шаблоне до замены
+MARK_START = '\x02'
+MARK_END = '\x03'
+SNIPPET_TOKENS = 24
+
+REBUILD_SQL = (
+    'DELETE FROM search_document',
+    'INSERT INTO search_document (rowid, text) '
+    'SELECT id, text FROM posts_post',
+    "INSERT INTO search_document (search_document) VALUES ('optimize')",
+    'DELETE FROM search_comment',
+    'INSERT INTO search_comment (rowid, text, post) '
+    'SELECT id, text, post_id FROM posts_comment',
+    "INSERT INTO search_comment (search_comment) VALUES ('optimize')",
+)
+
+
+class Snippet(Func):
+    """Отрывок столбца column таблицы field с подсвеченными совпадениями."""
+    function = 'snippet'
+    output_field = TextField()
+
+    def __init__(self, field, column, tokens=SNIPPET_TOKENS):
+        super().__init__(
+            F(field),
+            Value(column),
+            Value(MARK_START),
+            Value(MARK_END),
+            Value('…'),
+            Value(tokens),
+        )
+
+
+def parse(query):
+    """Запрос FTS5: основы слов как префиксы, хотя бы одно совпадение.
+
+    Каждый терм берётся в кавычки, поэтому операторы FTS5
+    из пользовательского ввода не разбираются.
+    """
+    prefixes = dict.fromkeys(
+        stem(word) for word in WORD.findall(query.lower())
+        if word not in STOP_WORDS
+    )
+    return ' OR '.join(f'"{prefix}"*' for prefix in prefixes if prefix)
+
+
+def _matches(expression):
+    """Совпадения в текстах постов и в комментариях."""
+    return (
+        Document.objects.filter(query__match=expression),
+        CommentDocument.objects.filter(query__match=expression),
+    )
+
+
+def search(query, queryset=None):
+    """Посты, найденные в тексте или комментариях.
+
+    rank — bm25 текста со знаком минус, чтобы лучшие совпадения шли
+    первыми при сортировке по убыванию, как у инвертированного
+    индекса; посты, найденные только по комментариям, получают 0
+    и идут после найденных по тексту. snippet — отрывок текста поста
+    с границами MARK_START и MARK_END.
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    expression = parse(query)
+    if not expression:
+        return queryset.none()
+    documents, comments = _matches(expression)
+    document = documents.filter(post=OuterRef('pk'))
+    return queryset.filter(
+        Q(pk__in=documents.values('post')) | Q(pk__in=comments.values('post'))
+    ).annotate(
+        rank=Coalesce(
+            Subquery(document.annotate(
+                score=ExpressionWrapper(-F('rank'), output_field=FloatField())
+            ).values('score'), output_field=FloatField()),
+            Value(0.0),
+            output_field=FloatField(),
+        ),
+        snippet=Subquery(
+            document.annotate(snippet=Snippet('query', 0)).values('snippet'),
+            output_field=TextField(),
+        ),
+    )
+
+
+def matching(query):
+    """id постов, найденных в тексте или комментариях, без ранга."""
+    expression = parse(query)
+    if not expression:
+        return Post.objects.none().values('pk')
+    documents, comments = _matches(expression)
+    return Post.objects.filter(
+        Q(pk__in=documents.values('post')) | Q(pk__in=comments.values('post'))
+    ).values('pk')
+
+
+def rebuild():
+    """Заполняет таблицы заново по всем постам и комментариям."""
+    with connection.cursor() as cursor:
+        for sql in REBUILD_SQL:
+            cursor.execute(sql)
+        cursor.execute('SELECT count(*) FROM search_document')
+        return cursor.fetchone()[0]
@@ -0,0 +1,237 @@
+"""Нечёткий поиск пользователей и групп по триграммам.
+
+Индекс живёт в памяти процесса: строится из базы при первом
+обращении, дальше правится сигналами моделей и раз
+в FUZZY_INDEX_TTL секунд перестраивается в фоновом потоке, чтобы
+подтянуть изменения, сделанные другими процессами. Пока идёт
+перестройка, запросы обслуживает старый индекс.
+"""
+import heapq
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from posts.models import Group, User
+
+WORD = re.compile(r'\w+')
+MIN_COVERAGE = 0.5
+MAX_TRIGRAMS = 255
+
+
+def trigrams(text, prefix=False):
+    """Триграммы слов текста с отступами, как в pg_trgm.
+
+    С prefix=True у последнего слова нет закрывающей триграммы:
+    его ещё дописывают, и оно должно совпадать с началом имени.
+    """
+    words = WORD.findall(text.lower())
+    grams = set()
+    for i, word in enumerate(words):
+        padded = f'  {word}'
+        if not (prefix and i == len(words) - 1):
+            padded += ' '
+        grams.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """Списки номеров записей по триграммам в массивах array('I').
+
+    Запись — одна строка объекта: у группы их две, заголовок и слаг.
+    Объект хранится числом pk * len(KINDS) + номер вида, поэтому
+    сотни тысяч имён занимают несколько массивов, а не кортежи.
+    Удалённые записи не вычищаются из списков, а помечаются DEAD
+    и пропускаются при поиске; мусор убирает полная перестройка.
+    """
+    KINDS = ('user', 'group')
+    DEAD = -1
+
+    def __init__(self):
+        self.codes = array('q')
+        self.sizes = array('B')
+        self.postings = {}
+        self.entries = {}
+        self.labels = {}
+        self.lock = threading.Lock()
+
+    def encode(self, kind, pk):
+        return pk * len(self.KINDS) + self.KINDS.index(kind)
+
+    def decode(self, code):
+        pk, kind = divmod(code, len(self.KINDS))
+        return self.KINDS[kind], pk
+
+    def _add(self, code, text):
+        grams = trigrams(text)
+        if not grams:
+            return
+        entry = len(self.codes)
+        self.codes.append(code)
+        self.sizes.append(min(len(grams), MAX_TRIGRAMS))
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                posting = self.postings[gram] = array('I')
+            posting.append(entry)
+        self.entries.setdefault(code, entry)
+
+    def _remove(self, code):
+        entry = self.entries.pop(code, None)
+        # Записи объекта добавляются подряд
+        while entry is not None and entry < len(self.codes):
+            if self.codes[entry] != code:
+                break
+            self.codes[entry] = self.DEAD
+            entry += 1
+        self.labels.pop(code, None)
+
+    def add(self, kind, pk, label, value, *texts):
+        """Добавляет или заменяет объект с подписью и значением для URL."""
+        code = self.encode(kind, pk)
+        with self.lock:
+            self._remove(code)
+            self.labels[code] = label if label == value else (label, value)
+            for text in texts:
+                self._add(code, text)
+
+    def remove(self, kind, pk):
+        with self.lock:
+            self._remove(self.encode(kind, pk))
+
+    def lookup(self, query, limit, kind=None):
+        """До limit объектов (kind, pk, label, value), лучшие первыми.
+
+        Объект подходит, если в нём есть хотя бы половина триграмм
+        запроса; из подходящих выше те, что покрывают запрос полнее,
+        а при равенстве — с меньшим числом лишних триграмм.
+        """
+        grams = trigrams(query, prefix=True)
+        if not grams:
+            return []
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        needed = len(grams) * MIN_COVERAGE
+        only = None if kind is None else self.KINDS.index(kind)
+        best = {}
+        for entry, count in shared.items():
+            code = self.codes[entry]
+            if code == self.DEAD or count < needed:
+                continue
+            if only is not None and code % len(self.KINDS) != only:
+                continue
+            score = (
+                count / len(grams),
+                count / (len(grams) + self.sizes[entry] - count),
+            )
+            if score > best.get(code, (0, 0)):
+                best[code] = score
+        top = heapq.nlargest(limit, best.items(), key=lambda item: item[1])
+        found = []
+        for code, _ in top:
+            label = self.labels[code]
+            if isinstance(label, str):
+                label = (label, label)
+            found.append(self.decode(code) + label)
+        return found
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def build():
+    index = TrigramIndex()
+    users = User.objects.values_list('pk', 'username')
+    for pk, username in users.iterator():
+        index.add('user', pk, username, username, username)
+    groups = Group.objects.values_list('pk', 'title', 'slug')
+    for pk, title, slug in groups.iterator():
+        index.add('group', pk, title, slug, title, slug)
+    return index
+
+
+_index = None
+_built = 0
+# Правки из сигналов, пришедшие во время сборки: их повторяют
+# на новом индексе, иначе он вышел бы из базы без них
+_pending = None
+_changes = threading.Lock()
+# Индекс строит один поток на процесс
+_building = threading.Lock()
+
+
+def _refresh():
+    """Строит индекс из базы и подменяет им текущий."""
+    global _index, _built, _pending
+    with _changes:
+        _pending = []
+    try:
+        index = build()
+    except BaseException:
+        with _changes:
+            _pending = None
+        raise
+    with _changes:
+        for change in _pending:
+            change(index)
+        _index, _built, _pending = index, time.monotonic(), None
+
+
+def _refresh_in_background():
+    try:
+        _refresh()
+    finally:
+        connection.close()
+        _building.release()
+
+
+def get_index():
+    """Индекс процесса; устаревший перестраивается в фоне."""
+    if _index is None:
+        with _building:
+            if _index is None:
+                _refresh()
+        return _index
+    expired = time.monotonic() - _built > settings.FUZZY_INDEX_TTL
+    if expired and _building.acquire(blocking=False):
+        threading.Thread(target=_refresh_in_background, daemon=True).start()
+    return _index
+
+
+def reset():
+    """Сбрасывает индекс процесса, следующий запрос построит его заново."""
+    global _index
+    _index = None
+
+
+def lookup(query, limit, kind=None):
+    return get_index().lookup(query, limit, kind)
+
+
+def _change(func):
+    with _changes:
+        if _index is not None:
+            func(_index)
+        if _pending is not None:
+            _pending.append(func)
+
+
+def add_user(user):
+    _change(lambda index: index.add(
+        'user', user.pk, user.username, user.username, user.username
+    ))
+
+
+def add_group(group):
+    _change(lambda index: index.add(
+        'group', group.pk, group.title, group.slug,
+        group.title, group.slug,
+    ))
+
+
+def remove(kind, pk):
+    _change(lambda index: index.remove(kind, pk))
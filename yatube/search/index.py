@@ -0,0 +1,129 @@
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from posts.models import Post
+
+from .models import Posting, Term
+from .stemmer import terms
+
+BATCH_SIZE = 500
+
+
+def is_enabled():
+    """Индекс ведётся, только если поиск идёт через search.engine.
+
+    При переключении SEARCH_BACKEND на него индекс собирается
+    командой rebuild_search_index.
+    """
+    return settings.SEARCH_BACKEND == 'search.engine'
+
+
+def _shift(changed, delta):
+    Term.objects.filter(term__in=changed).update(
+        documents=F('documents') + delta
+    )
+
+
+def index_post(post):
+    """Обновляет индекс поста по разнице старых и новых термов."""
+    new = Counter(terms(post.text))
+    old = dict(
+        Posting.objects.filter(post=post).values_list('term', 'weight')
+    )
+    added = new.keys() - old.keys()
+    removed = old.keys() - new.keys()
+    changed = [
+        term for term in new.keys() & old.keys() if new[term] != old[term]
+    ]
+    with transaction.atomic():
+        if removed:
+            Posting.objects.filter(post=post, term__in=removed).delete()
+            _shift(removed, -1)
+        for term in changed:
+            Posting.objects.filter(post=post, term=term).update(
+                weight=new[term]
+            )
+        if added:
+            Posting.objects.bulk_create(
+                Posting(term=term, post=post, weight=new[term])
+                for term in added
+            )
+            Term.objects.bulk_create(
+                (Term(term=term) for term in added), ignore_conflicts=True
+            )
+            _shift(added, 1)
+
+
+def index_new(posts):
+    """Индексирует пачку только что созданных постов.
+
+    В отличие от index_post не читает старые вхождения: их нет.
+    Частоты термов сдвигаются одним UPDATE на каждую величину сдвига.
+    """
+    postings = []
+    documents = Counter()
+    for post in posts:
+        weights = Counter(terms(post.text))
+        postings += [
+            Posting(term=term, post_id=post.pk, weight=weight)
+            for term, weight in weights.items()
+        ]
+        documents.update(weights.keys())
+    by_delta = defaultdict(list)
+    for term, delta in documents.items():
+        by_delta[delta].append(term)
+    with transaction.atomic():
+        Posting.objects.bulk_create(postings, batch_size=BATCH_SIZE)
+        Term.objects.bulk_create(
+            (Term(term=term) for term in documents),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        for delta, changed in by_delta.items():
+            for start in range(0, len(changed), BATCH_SIZE):
+                _shift(changed[start:start + BATCH_SIZE], delta)
+
+
+def reindex_post(post_id):
+    """Задача очереди: индексирует пост по его текущему тексту."""
+    post = Post.objects.filter(pk=post_id).only('text').first()
+    if post is not None and is_enabled():
+        index_post(post)
+
+
+def unindex_post(post):
+    """Уменьшает частоты термов удаляемого поста.
+
+    Сами вхождения удалит каскад.
+    """
+    _shift(
+        list(Posting.objects.filter(post=post).values_list('term', flat=True)),
+        -1,
+    )
+
+
+def rebuild():
+    """Строит индекс всех постов с нуля, возвращает число постов."""
+    Posting.objects.all().delete()
+    Term.objects.all().delete()
+    batch = []
+    indexed = 0
+    for post_id, text in Post.objects.values_list('id', 'text').iterator():
+        batch += [
+            Posting(term=term, post_id=post_id, weight=weight)
+            for term, weight in Counter(terms(text)).items()
+        ]
+        indexed += 1
+        if len(batch) >= BATCH_SIZE:
+            Posting.objects.bulk_create(batch)
+            batch = []
+    Posting.objects.bulk_create(batch)
+    Term.objects.bulk_create(
+        Term(term=term, documents=documents)
+        for term, documents in Posting.objects.values_list(
+            'term'
+        ).annotate(Count('post')).iterator()
+    )
+    return indexed
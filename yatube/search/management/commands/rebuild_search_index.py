@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from search import fts, index
+
+
+class Command(BaseCommand):
+    help = 'Строит поисковые индексы постов с нуля.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if index.is_enabled():
+                indexed = index.rebuild()
+                self.stdout.write(f'Проиндексировано постов: {indexed}')
+            documents = fts.rebuild()
+        self.stdout.write(f'Документов FTS5: {documents}')
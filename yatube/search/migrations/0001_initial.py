@@ -0,0 +1,67 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_index(apps, schema_editor):
+    from collections import Counter
+
+    from search.stemmer import terms
+
+    Post = apps.get_model('posts', 'Post')
+    Posting = apps.get_model('search', 'Posting')
+    Term = apps.get_model('search', 'Term')
+    documents = Counter()
+    for post_id, text in Post.objects.values_list('id', 'text').iterator():
+        weights = Counter(terms(text))
+        documents.update(weights.keys())
+        Posting.objects.bulk_create(
+            Posting(term=term, post_id=post_id, weight=weight)
+            for term, weight in weights.items()
+        )
+    Term.objects.bulk_create(
+        (Term(term=term, documents=count) for term, count in documents.items()),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('posts', '0017_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Term',
+            fields=[
+                ('term', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Терм')),
+                ('documents', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+            ],
+            options={
+                'verbose_name': 'Term',
+                'verbose_name_plural': 'Terms',
+            },
+        ),
+        migrations.CreateModel(
+            name='Posting',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Терм')),
+                ('weight', models.PositiveIntegerField(verbose_name='Вхождений')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='posts.Post')),
+            ],
+            options={
+                'verbose_name': 'Posting',
+                'verbose_name_plural': 'Postings',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='posting',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='unique_posting'),
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
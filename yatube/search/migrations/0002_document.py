@@ -0,0 +1,77 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+import search.models
+
+COMMENTS = (
+    "coalesce((SELECT group_concat(text, char(10)) FROM posts_comment "
+    "WHERE post_id = {post}), '')"
+)
+
+FORWARD = [
+    "CREATE VIRTUAL TABLE search_document USING fts5("
+    "text, comments, tokenize = 'unicode61 remove_diacritics 2')",
+    "INSERT INTO search_document (rowid, text, comments) "
+    "SELECT id, text, " + COMMENTS.format(post='posts_post.id')
+    + " FROM posts_post",
+    "CREATE TRIGGER search_post_insert AFTER INSERT ON posts_post BEGIN "
+    "INSERT INTO search_document (rowid, text, comments) "
+    "VALUES (new.id, new.text, ''); END",
+    "CREATE TRIGGER search_post_update AFTER UPDATE OF text ON posts_post "
+    "BEGIN UPDATE search_document SET text = new.text "
+    "WHERE rowid = new.id; END",
+    "CREATE TRIGGER search_post_delete AFTER DELETE ON posts_post BEGIN "
+    "DELETE FROM search_document WHERE rowid = old.id; END",
+    "CREATE TRIGGER search_comment_insert AFTER INSERT ON posts_comment "
+    "BEGIN UPDATE search_document SET comments = "
+    + COMMENTS.format(post='new.post_id')
+    + " WHERE rowid = new.post_id; END",
+    "CREATE TRIGGER search_comment_update "
+    "AFTER UPDATE OF text, post_id ON posts_comment BEGIN "
+    "UPDATE search_document SET comments = "
+    + COMMENTS.format(post='search_document.rowid')
+    + " WHERE rowid IN (old.post_id, new.post_id); END",
+    "CREATE TRIGGER search_comment_delete AFTER DELETE ON posts_comment "
+    "BEGIN UPDATE search_document SET comments = "
+    + COMMENTS.format(post='old.post_id')
+    + " WHERE rowid = old.post_id; END",
+]
+
+BACKWARD = [
+    'DROP TRIGGER search_comment_delete',
+    'DROP TRIGGER search_comment_update',
+    'DROP TRIGGER search_comment_insert',
+    'DROP TRIGGER search_post_delete',
+    'DROP TRIGGER search_post_update',
+    'DROP TRIGGER search_post_insert',
+    'DROP TABLE search_document',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_counters'),
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Document',
+            fields=[
+                ('post', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='document', serialize=False, to='posts.Post')),
+                ('text', models.TextField(verbose_name='Текст')),
+                ('comments', models.TextField(verbose_name='Комментарии')),
+                ('query', search.models.FullTextField(db_column='search_document', editable=False)),
+                ('rank', models.FloatField(db_column='rank', editable=False)),
+            ],
+            options={
+                'verbose_name': 'Document',
+                'verbose_name_plural': 'Documents',
+                'db_table': 'search_document',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(FORWARD, BACKWARD),
+    ]
@@ -0,0 +1,84 @@
+from importlib import import_module
+
+from django.db import migrations, models
+import django.db.models.deletion
+import search.models
+
+TOKENIZE = "tokenize = 'unicode61 remove_diacritics 2'"
+
+FORWARD = [
+    'DROP TRIGGER search_comment_delete',
+    'DROP TRIGGER search_comment_update',
+    'DROP TRIGGER search_comment_insert',
+    'DROP TRIGGER search_post_delete',
+    'DROP TRIGGER search_post_update',
+    'DROP TRIGGER search_post_insert',
+    'DROP TABLE search_document',
+    f'CREATE VIRTUAL TABLE search_document USING fts5(text, {TOKENIZE})',
+    'INSERT INTO search_document (rowid, text) '
+    'SELECT id, text FROM posts_post',
+    "CREATE TRIGGER search_post_insert AFTER INSERT ON posts_post BEGIN "
+    "INSERT INTO search_document (rowid, text) "
+    "VALUES (new.id, new.text); END",
+    "CREATE TRIGGER search_post_update AFTER UPDATE OF text ON posts_post "
+    "BEGIN UPDATE search_document SET text = new.text "
+    "WHERE rowid = new.id; END",
+    "CREATE TRIGGER search_post_delete AFTER DELETE ON posts_post BEGIN "
+    "DELETE FROM search_document WHERE rowid = old.id; END",
+    'CREATE VIRTUAL TABLE search_comment USING fts5('
+    f'text, post UNINDEXED, {TOKENIZE})',
+    'INSERT INTO search_comment (rowid, text, post) '
+    'SELECT id, text, post_id FROM posts_comment',
+    "CREATE TRIGGER search_comment_insert AFTER INSERT ON posts_comment "
+    "BEGIN INSERT INTO search_comment (rowid, text, post) "
+    "VALUES (new.id, new.text, new.post_id); END",
+    "CREATE TRIGGER search_comment_update "
+    "AFTER UPDATE OF text, post_id ON posts_comment BEGIN "
+    "UPDATE search_comment SET text = new.text, post = new.post_id "
+    "WHERE rowid = new.id; END",
+    "CREATE TRIGGER search_comment_delete AFTER DELETE ON posts_comment "
+    "BEGIN DELETE FROM search_comment WHERE rowid = old.id; END",
+]
+
+BACKWARD = [
+    'DROP TRIGGER search_comment_delete',
+    'DROP TRIGGER search_comment_update',
+    'DROP TRIGGER search_comment_insert',
+    'DROP TABLE search_comment',
+    'DROP TRIGGER search_post_delete',
+    'DROP TRIGGER search_post_update',
+    'DROP TRIGGER search_post_insert',
+    'DROP TABLE search_document',
+] + import_module('search.migrations.0002_document').FORWARD
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_postimport'),
+        ('search', '0002_document'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='document',
+            name='comments',
+        ),
+        migrations.CreateModel(
+            name='CommentDocument',
+            fields=[
+                ('comment', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='document', serialize=False, to='posts.Comment')),
+                ('text', models.TextField(verbose_name='Текст')),
+                ('post', models.ForeignKey(db_column='post', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='comment_documents', to='posts.Post')),
+                ('query', search.models.FullTextField(db_column='search_comment', editable=False)),
+                ('rank', models.FloatField(db_column='rank', editable=False)),
+            ],
+            options={
+                'verbose_name': 'Comment document',
+                'verbose_name_plural': 'Comment documents',
+                'db_table': 'search_comment',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(FORWARD, BACKWARD),
+    ]
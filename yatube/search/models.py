@@ -0,0 +1,114 @@
+from django.db import models
+from posts.models import Comment, Post
+
+
+class Term(models.Model):
+    """Терм словаря с числом постов, в которых он встречается."""
+    term = models.CharField('Терм', max_length=64, primary_key=True)
+    documents = models.PositiveIntegerField('Постов', default=0)
+
+    class Meta:
+        verbose_name = 'Term'
+        verbose_name_plural = 'Terms'
+
+    def __str__(self) -> str:
+        return self.term
+
+
+class Posting(models.Model):
+    """Вхождение терма в пост — строка инвертированного индекса."""
+    term = models.CharField('Терм', max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='postings',
+    )
+    weight = models.PositiveIntegerField('Вхождений')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'post'], name='unique_posting'
+            ),
+        ]
+        verbose_name = 'Posting'
+        verbose_name_plural = 'Postings'
+
+    def __str__(self) -> str:
+        return self.term
+
+
+class FullTextField(models.TextField):
+    """Скрытый столбец FTS5 с именем таблицы: по нему ищут MATCH."""
+
+
+@FullTextField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class Document(models.Model):
+    """Строка FTS5-таблицы с текстом поста.
+
+    Таблицу создаёт и держит в актуальном виде миграция
+    с триггерами на posts_post, rowid — id поста.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='document',
+    )
+    text = models.TextField('Текст')
+    query = FullTextField(db_column='search_document', editable=False)
+    rank = models.FloatField(db_column='rank', editable=False)
+
+    class Meta:
+        managed = False
+        db_table = 'search_document'
+        verbose_name = 'Document'
+        verbose_name_plural = 'Documents'
+
+    def __str__(self) -> str:
+        return self.text[:15]
+
+
+class CommentDocument(models.Model):
+    """Строка FTS5-таблицы с текстом комментария.
+
+    Комментарий — отдельная строка, rowid — id комментария: триггеры
+    на posts_comment меняют одну строку, а не пересобирают текст
+    всех комментариев поста.
+    """
+    comment = models.OneToOneField(
+        Comment,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='document',
+    )
+    text = models.TextField('Текст')
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.DO_NOTHING,
+        db_column='post',
+        db_constraint=False,
+        related_name='comment_documents',
+    )
+    query = FullTextField(db_column='search_comment', editable=False)
+    rank = models.FloatField(db_column='rank', editable=False)
+
+    class Meta:
+        managed = False
+        db_table = 'search_comment'
+        verbose_name = 'Comment document'
+        verbose_name_plural = 'Comment documents'
+
+    def __str__(self) -> str:
+        return self.text[:15]
@@ -0,0 +1,38 @@
+from core.tasks import defer
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from posts.models import Group, Post, User
+
+from . import fuzzy
+from .index import is_enabled, reindex_post, unindex_post
+
+
+@receiver(post_save, sender=Post)
+def post_indexed(sender, instance, update_fields=None, **kwargs):
+    if not is_enabled():
+        return
+    if update_fields is None or 'text' in update_fields:
+        defer(reindex_post, instance.pk)
+
+
+@receiver(pre_delete, sender=Post)
+def post_unindexed(sender, instance, **kwargs):
+    if is_enabled():
+        unindex_post(instance)
+
+
+@receiver(post_save, sender=User)
+def user_fuzzy_indexed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'username' in update_fields:
+        fuzzy.add_user(instance)
+
+
+@receiver(post_save, sender=Group)
+def group_fuzzy_indexed(sender, instance, **kwargs):
+    fuzzy.add_group(instance)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def fuzzy_unindexed(sender, instance, **kwargs):
+    fuzzy.remove(sender._meta.model_name, instance.pk)
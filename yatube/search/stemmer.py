@@ -0,0 +1,80 @@
+"""Стеммер Портера (Snowball) для русского языка и разбиение на термы."""
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$'
+)
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых'
+    r'|ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло'
+    r'|ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)'
+    r'|((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем'
+    r'|ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+RV = re.compile(rf'^(.*?[{VOWELS}])(.*)$')
+DERIVATIONAL = re.compile(rf'.*[^{VOWELS}]+[{VOWELS}].*ость?$')
+DERIVATIONAL_ENDING = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+
+WORD = re.compile(r'\w+')
+
+STOP_WORDS = frozenset((
+    'а', 'без', 'бы', 'в', 'во', 'вот', 'все', 'вы', 'да', 'для', 'до',
+    'же', 'за', 'и', 'из', 'или', 'к', 'как', 'ли', 'мы', 'на', 'не',
+    'ни', 'но', 'о', 'об', 'он', 'она', 'они', 'оно', 'от', 'по', 'под',
+    'при', 'с', 'со', 'та', 'так', 'то', 'ты', 'у', 'что', 'это', 'я',
+))
+
+MAX_TERM_LENGTH = 64
+
+
+def _cut(pattern, word):
+    return pattern.sub('', word, 1)
+
+
+def stem(word):
+    """Возвращает основу слова; латиница и числа не меняются."""
+    word = word.lower().replace('ё', 'е')
+    match = RV.match(word)
+    if match is None:
+        return word
+    start, rv = match.groups()
+    cut = _cut(PERFECTIVE_GERUND, rv)
+    if cut == rv:
+        rv = _cut(REFLEXIVE, rv)
+        cut = _cut(ADJECTIVE, rv)
+        if cut != rv:
+            rv = _cut(PARTICIPLE, cut)
+        else:
+            cut = _cut(VERB, rv)
+            rv = _cut(NOUN, rv) if cut == rv else cut
+    else:
+        rv = cut
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    if DERIVATIONAL.match(rv):
+        rv = _cut(DERIVATIONAL_ENDING, rv)
+    if rv.endswith('ь'):
+        rv = rv[:-1]
+    else:
+        rv = _cut(SUPERLATIVE, rv)
+        if rv.endswith('нн'):
+            rv = rv[:-1]
+    return start + rv
+
+
+def terms(text):
+    """Основы значимых слов текста в порядке появления."""
+    for word in WORD.findall(text.lower()):
+        if word not in STOP_WORDS:
+            yield stem(word)[:MAX_TERM_LENGTH]
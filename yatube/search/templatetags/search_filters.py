@@ -0,0 +1,15 @@
+from django import template
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from ..fts import MARK_END, MARK_START
+
+register = template.Library()
+
+
+@register.filter
+def highlight(snippet):
+    """Экранирует отрывок и подсвечивает совпадения тегом <mark>."""
+    html = escape(snippet)
+    html = html.replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+    return mark_safe(html)
@@ -0,0 +1,97 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Post, User
+
+from ..fts import MARK_END, MARK_START, parse, search
+
+
+class FullTextSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoBody')
+        cls.cats = Post.objects.create(
+            author=cls.user, text='Кот и коты, котами полна квартира'
+        )
+        cls.dog = Post.objects.create(
+            author=cls.user, text='Собака гуляет одна'
+        )
+        Post.objects.create(author=cls.user, text='Про погоду')
+
+    def test_parse_quotes_terms(self):
+        """Операторы FTS5 из запроса не разбираются."""
+        self.assertEqual(
+            parse('коты NOT "собаки'), '"кот"* OR "not"* OR "собак"*'
+        )
+        self.assertEqual(parse('и а'), '')
+
+    def test_ranked_by_bm25(self):
+        """Посты упорядочены по bm25, отрывок размечен границами."""
+        Post.objects.create(author=self.user, text='Кот на окне')
+        results = list(search('котов').order_by('-rank'))
+        self.assertEqual(results[0], self.cats)
+        self.assertEqual(len(results), 2)
+        self.assertIn(f'{MARK_START}Кот{MARK_END}', results[0].snippet)
+
+    def test_triggers_follow_posts_and_comments(self):
+        """Триггеры повторяют правки постов и комментариев."""
+        comment = Comment.objects.create(
+            post=self.dog, author=self.user, text='Где-то бегает кот'
+        )
+        self.assertIn(self.dog, search('кот'))
+        comment.delete()
+        self.assertNotIn(self.dog, search('кот'))
+        Post.objects.filter(pk=self.dog.pk).update(text='Собака и кот')
+        self.assertIn(self.dog, search('кот'))
+        Post.objects.filter(pk=self.dog.pk).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT count(*) FROM search_document WHERE rowid = %s',
+                [self.dog.pk],
+            )
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_comment_rows(self):
+        """Комментарий — своя строка таблицы: правка меняет её одну,
+        посты, найденные только по комментариям, идут после остальных."""
+        first = Comment.objects.create(
+            post=self.dog, author=self.user, text='Про котов'
+        )
+        Comment.objects.create(
+            post=self.dog, author=self.user, text='Ещё один'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT rowid, post FROM search_comment ORDER BY rowid'
+            )
+            self.assertEqual(cursor.fetchall()[0], (first.pk, self.dog.pk))
+        results = list(search('кот').order_by('-rank', '-pk'))
+        self.assertEqual(results, [self.cats, self.dog])
+        self.assertIsNone(results[1].snippet)
+        Comment.objects.filter(pk=first.pk).update(text='Про собак')
+        self.assertNotIn(self.dog, search('кот'))
+
+    def test_rebuild_command(self):
+        Comment.objects.create(
+            post=self.dog, author=self.user, text='Дождь'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM search_document')
+            cursor.execute('DELETE FROM search_comment')
+        self.assertFalse(search('погода').exists())
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(
+            list(search('погода')), [Post.objects.get(text='Про погоду')]
+        )
+        self.assertEqual(list(search('дождь')), [self.dog])
+
+    @override_settings(SEARCH_BACKEND='search.fts')
+    def test_results_view_escapes_snippet(self):
+        """Отрывок экранируется, совпадения выделены тегом <mark>."""
+        Post.objects.create(author=self.user, text='<b>котик</b>')
+        response = Client().get(reverse('search:results'), {'q': 'котик'})
+        self.assertContains(response, '&lt;b&gt;<mark>котик</mark>&lt;/b&gt;')
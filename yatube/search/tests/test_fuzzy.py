@@ -0,0 +1,97 @@
+from unittest import mock
+
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Group, User
+
+from .. import fuzzy
+
+
+class FuzzyLookupTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo_tolstoy')
+        User.objects.create_user(username='leonid')
+        User.objects.create_user(username='dostoevsky')
+        cls.group = Group.objects.create(
+            title='Русская классика',
+            slug='classics',
+            description='test description',
+        )
+
+    def setUp(self):
+        fuzzy.reset()
+
+    def labels(self, query, kind=None):
+        return [label for _, _, label, _ in fuzzy.lookup(query, 5, kind)]
+
+    def test_typo_tolerant(self):
+        """Опечатка в имени всё равно находит пользователя."""
+        self.assertEqual(self.labels('leo_tolstoi')[0], 'leo_tolstoy')
+        self.assertEqual(self.labels('dostoyevsky'), ['dostoevsky'])
+        self.assertEqual(self.labels('clasics'), ['Русская классика'])
+
+    def test_prefix_ranks_shorter_first(self):
+        """Недописанное слово совпадает с началом имён."""
+        self.assertEqual(self.labels('leo', 'user'), ['leonid', 'leo_tolstoy'])
+
+    def test_signals_update_index(self):
+        """Правки пользователей и групп сразу видны в индексе."""
+        fuzzy.get_index()
+        User.objects.create_user(username='chekhov')
+        self.assertEqual(self.labels('chehov'), ['chekhov'])
+        self.group.slug = 'russian'
+        self.group.save()
+        self.assertEqual(self.labels('clasics'), [])
+        self.assertEqual(self.labels('russain', 'group'), ['Русская классика'])
+        User.objects.get(username='leonid').delete()
+        self.assertNotIn('leonid', self.labels('leo'))
+
+    def test_expired_index_rebuilt_in_background(self):
+        """Устаревший индекс отвечает, пока один поток строит новый;
+        правки во время сборки попадают и в новый индекс."""
+        old = fuzzy.get_index()
+        threads = []
+        with mock.patch.object(fuzzy, '_built', 0), \
+                mock.patch.object(fuzzy.threading, 'Thread') as thread:
+            thread.side_effect = lambda target, daemon: threads.append(
+                target
+            ) or mock.Mock()
+            self.assertIs(fuzzy.get_index(), old)
+            self.assertIs(fuzzy.get_index(), old)
+        self.assertEqual(len(threads), 1)
+        build = fuzzy.build
+
+        def build_with_edit():
+            index = build()
+            User.objects.create_user(username='bulgakov')
+            return index
+
+        with mock.patch.object(fuzzy, 'build', build_with_edit), \
+                mock.patch.object(fuzzy.connection, 'close'):
+            threads[0]()
+        self.assertIsNot(fuzzy.get_index(), old)
+        self.assertEqual(self.labels('bulgakof'), ['bulgakov'])
+
+    def test_autocomplete_view(self):
+        response = Client().get(
+            reverse('search:autocomplete'), {'q': 'dostoevski'}
+        )
+        self.assertEqual(response.json(), {'results': [{
+            'type': 'user',
+            'label': 'dostoevsky',
+            'url': reverse('posts:profile', args=['dostoevsky']),
+        }]})
+
+    def test_not_found_suggests(self):
+        """404 профиля с опечаткой подсказывает похожие имена."""
+        response = Client().get(
+            reverse('posts:profile', args=['leo_tolstoi'])
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertContains(
+            response,
+            reverse('posts:profile', args=['leo_tolstoy']),
+            status_code=404,
+        )
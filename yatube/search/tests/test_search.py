@@ -0,0 +1,92 @@
+from io import StringIO
+
+from core.tasks import run_pending
+from core.tests.utils import RunOnCommitMixin
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post, User
+
+from yatube.settings import PAGE_CONST
+
+from ..engine import search
+from ..models import Posting, Term
+from ..stemmer import stem
+
+
+class StemmerTest(TestCase):
+    def test_word_forms_share_stem(self):
+        """Формы одного слова сводятся к одной основе."""
+        self.assertEqual(stem('котами'), stem('кот'))
+        self.assertEqual(stem('красивая'), stem('красивые'))
+        self.assertEqual(stem('Ёлка'), stem('елки'))
+
+
+@override_settings(SEARCH_BACKEND='search.engine')
+class SearchTest(RunOnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoBody')
+        cls.cats = Post.objects.create(
+            author=cls.user, text='Кот и коты, котами полна квартира'
+        )
+        cls.dog = Post.objects.create(
+            author=cls.user, text='Собака гуляет с котом'
+        )
+        Post.objects.create(author=cls.user, text='Про погоду')
+        run_pending()
+
+    def test_ranked_results(self):
+        """Пост с большим числом вхождений терма выше в выдаче."""
+        results = list(search('коты').order_by('-rank'))
+        self.assertEqual(results, [self.cats, self.dog])
+
+    def test_index_follows_edits(self):
+        """Правка поста обновляет индекс по разнице термов."""
+        dog = Post.objects.get(pk=self.dog.pk)
+        dog.text = 'Собака гуляет одна'
+        dog.save()
+        run_pending()
+        self.assertEqual(list(search('кот')), [self.cats])
+        self.assertEqual(Term.objects.get(term=stem('кот')).documents, 1)
+        dog.delete()
+        self.assertEqual(Term.objects.get(term=stem('собака')).documents, 0)
+
+    def test_results_view(self):
+        """Страница поиска отдаёт найденные посты."""
+        response = Client().get(reverse('search:results'), {'q': 'котов'})
+        self.assertEqual(
+            list(response.context['page_obj']), [self.cats, self.dog]
+        )
+
+    @override_settings(SEARCH_BACKEND='search.fts')
+    def test_not_indexed_with_other_backend(self):
+        """С FTS5 в настройках инвертированный индекс не ведётся."""
+        post = Post.objects.create(author=self.user, text='Лисица')
+        run_pending()
+        self.assertFalse(Posting.objects.filter(post=post).exists())
+
+    def test_rebuild_search_index_command(self):
+        Posting.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(
+            list(search('погода')), [Post.objects.get(text='Про погоду')]
+        )
+
+    def test_results_keyset_pages(self):
+        """Выдача листается курсором по (rank, id) без повторов."""
+        for i in range(PAGE_CONST):
+            Post.objects.create(author=self.user, text=f'Кот номер {i}')
+        run_pending()
+        client = Client()
+        response = client.get(reverse('search:results'), {'q': 'кот'})
+        first = list(response.context['page_obj'])
+        cursor = response.context['page_obj'].paginator.next_cursor
+        response = client.get(
+            reverse('search:results'), {'q': 'кот', 'after': cursor}
+        )
+        second = list(response.context['page_obj'])
+        self.assertEqual(len(first), PAGE_CONST)
+        self.assertEqual(len(second), 2)
+        self.assertFalse(set(first) & set(second))
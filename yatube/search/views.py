@@ -0,0 +1,61 @@
+from importlib import import_module
+
+from core.thumbnails import prefetch_thumbnails
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.urls import reverse
+from posts.models import Post
+
+from yatube.settings import PAGE_CONST
+
+from . import fuzzy
+from .engine import RankPaginator
+
+
+def results(request):
+    query = request.GET.get('q', '').strip()
+    search = import_module(settings.SEARCH_BACKEND).search
+    page_obj = RankPaginator(
+        search(query, Post.objects.for_feed()),
+        PAGE_CONST,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    ).cursor_page()
+    prefetch_thumbnails(page_obj)
+    context = {
+        'q': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'search/results.html', context)
+
+
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+AUTOCOMPLETE_URLS = {
+    'user': 'posts:profile',
+    'group': 'posts:group_list',
+}
+
+
+def autocomplete(request):
+    """Кандидаты для подсказки: пользователи и группы, похожие на ?q=."""
+    try:
+        limit = int(request.GET.get('limit', AUTOCOMPLETE_LIMIT))
+    except ValueError:
+        limit = AUTOCOMPLETE_LIMIT
+    limit = max(1, min(limit, AUTOCOMPLETE_MAX_LIMIT))
+    only = request.GET.get('type')
+    if only not in AUTOCOMPLETE_URLS:
+        only = None
+    results = [
+        {
+            'type': kind,
+            'label': label,
+            'url': reverse(AUTOCOMPLETE_URLS[kind], args=[value]),
+        }
+        for kind, _, label, value in fuzzy.lookup(
+            request.GET.get('q', ''), limit, only
+        )
+    ]
+    return JsonResponse({'results': results})
@@ -33,6 +33,8 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
+    'search.apps.SearchConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
@@ -40,10 +42,12 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.AnonymousPageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -130,15 +134,89 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 PAGE_CONST = 10
 
+COMMENTS_PAGE_CONST = 20
+
+# Авторы с большим числом подписчиков читаются в ленту при запросе
+FANOUT_FOLLOWERS_LIMIT = 1000
+# Популярным автор перестаёт быть, только когда подписчиков меньше
+# этой доли порога: подписка и отписка у порога не перекладывают ленты
+FANOUT_DEMOTE_RATIO = 0.9
+# Сколько последних постов автора попадает в ленту при подписке
+FANOUT_BACKFILL_POSTS = 200
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Миниатюры строятся в фоне: шаблоны берут только готовые
+THUMBNAIL_BACKEND = 'core.thumbnails.PregeneratedBackend'
+THUMBNAIL_KVSTORE = 'core.thumbnails.KVStore'
+
+# Загрузки пишутся во временные файлы; картинки больше лимитов
+# отклоняются по заголовку, не дожидаясь конца файла
+FILE_UPLOAD_HANDLERS = ['core.uploads.ImageUploadHandler']
+IMAGE_UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 40 * 1000 * 1000
+# PNG и WEBP декодируются целиком: 12 Мп — около 48 МБ в RGBA
+IMAGE_UPLOAD_MAX_DECODED_PIXELS = 12 * 1000 * 1000
+IMAGE_UPLOAD_MAX_SIDE = 2560
+
+# Размеры миниатюр из шаблонов, которые строятся сразу после загрузки
+THUMBNAIL_PREGENERATE = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+# Миниатюры видны на странице сразу, варианты для srcset подождут
+THUMBNAIL_TASK_PRIORITY = 10
+
+# Очередь фоновых задач core.tasks: сколько задач выполняет
+# один runworker, на сколько секунд задача берётся в аренду,
+# сколько раз и с какой начальной задержкой её повторять
+TASK_WORKERS = 2
+TASK_BATCH_SIZE = 10
+TASK_LEASE = 300
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = 10
+TASK_POLL_INTERVAL = 1
+
+# Ширины и форматы вариантов картинок поста для srcset; пропорции
+# те же, что у миниатюры 960x339 в лентах
+IMAGE_VARIANT_WIDTHS = (320, 640, 960)
+IMAGE_VARIANT_FORMATS = ('webp', 'jpeg')
+IMAGE_VARIANT_RATIO = (960, 339)
+
+# Для разработки кэш живёт в памяти процесса. Сайт из нескольких
+# процессов и runworker должны делить кэш: версии лент и ключей
+# Surrogate-Key, сброшенные в одном процессе, нужны остальным.
+# Для этого CACHE_BACKEND и CACHE_LOCATION задают memcached или
+# Redis; check --deploy предупреждает о кэше в памяти. Версии —
+# время, поэтому вытесненный счётчик не вернёт старые записи
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
     }
 }
 
+# Тесты получают свой пустой кэш в памяти
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# Модуль поиска с функцией search(query, queryset): search.fts или
+# search.engine — инвертированный индекс
+SEARCH_BACKEND = 'search.fts'
+
+# Раз в столько секунд процесс перечитывает в фоне триграммный индекс
+# пользователей и групп, чтобы увидеть правки других процессов
+FUZZY_INDEX_TTL = 60 * 10
+
+# Срок жизни страниц, закэшированных для гостей
+PAGE_CACHE_TIMEOUT = 60 * 60
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 PICTURE = (
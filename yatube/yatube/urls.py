@@ -8,6 +8,8 @@ urlpatterns = [
     path('about/', include('about.urls', namespace='about')),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
+    path('search/', include('search.urls', namespace='search')),
+    path('api/', include('api.urls', namespace='api')),
     path('', include('posts.urls', namespace='posts'))
 ]
 